@@ -0,0 +1,185 @@
+"""HTTP API lokal (asyncio) untuk tablet armada dan integrasi order Pertamina.
+
+Memakai storage yang sama dengan aplikasi Streamlit (perubahan langsung
+terlihat di halaman Input/Rekap lewat versi data). Akses SQLite dijalankan di
+thread pool dan render PDF di pool proses terpisah, sehingga event loop tidak
+pernah terblokir.
+
+    python api.py --host 0.0.0.0 --port 8600
+
+Endpoint (JSON, kolom = nama kolom NEW_COLUMNS):
+
+    GET    /health                   status + versi data
+    POST   /do/reserve               pesan nomor DO berikutnya  -> {"NOMOR DO": ...}
+    DELETE /do/reserve/{nomor}       lepas nomor yang batal dipakai
+    POST   /do                       buat DO (tanpa NOMOR DO = nomor baru)   -> 201
+    GET    /do/{nomor}               ambil DO
+    PUT    /do/{nomor}               ubah DO (kolom yang dikirim saja)
+    DELETE /do/{nomor}               hapus DO                                -> 204
+    GET    /do/{nomor}/pdf           PDF Surat Jalan
+    GET    /metrics                  metrik latensi (format Prometheus)
+
+Error validasi -> 422 {"error", "detail": [{"Kolom", "Pesan"}]}; DO tidak ada
+-> 404; NOMOR DO sudah dipakai -> 409.
+"""
+import argparse
+import asyncio
+import contextlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+from starlette.routing import Route
+
+from core import metrics
+from core.batch import render_one
+from core.importer import validate_record
+from core.pdf import pdf_filename
+from core.schema import SQLITE_PATH
+from core.storage import get_storage
+
+
+def _error(status, message, detail=None):
+    body = {"error": message}
+    if detail:
+        body["detail"] = detail
+    return JSONResponse(body, status_code=status)
+
+
+async def _json_body(request):
+    try:
+        body = await request.json()
+    except ValueError:
+        return None
+    return body if isinstance(body, dict) else None
+
+
+# --- Handler ---
+async def health(request):
+    version = await run_in_threadpool(request.app.state.storage.data_version)
+    return JSONResponse({"status": "ok", "data_version": version})
+
+
+async def reserve_number(request):
+    do_number = await run_in_threadpool(request.app.state.storage.reserve_do_number)
+    return JSONResponse({"NOMOR DO": do_number}, status_code=201)
+
+
+async def release_number(request):
+    released = await run_in_threadpool(request.app.state.storage.release_do_number, request.path_params["nomor"])
+    return JSONResponse({"released": released})
+
+
+async def create_do(request):
+    body = await _json_body(request)
+    if body is None:
+        return _error(400, "Body harus objek JSON")
+    row, errors = await run_in_threadpool(validate_record, body)
+    if errors:
+        return _error(422, "Data DO tidak valid", errors)
+    storage = request.app.state.storage
+    do_number = await run_in_threadpool(storage.create_do, row)
+    if do_number is None:
+        return _error(409, f"NOMOR DO {row['NOMOR DO']} sudah dipakai")
+    return JSONResponse(await run_in_threadpool(storage.get_do, do_number), status_code=201)
+
+
+async def get_do(request):
+    record = await run_in_threadpool(request.app.state.storage.get_do, request.path_params["nomor"])
+    if record is None:
+        return _error(404, "DO tidak ditemukan")
+    return JSONResponse(record)
+
+
+async def update_do(request):
+    do_number = request.path_params["nomor"]
+    body = await _json_body(request)
+    if body is None:
+        return _error(400, "Body harus objek JSON")
+    storage = request.app.state.storage
+    existing = await run_in_threadpool(storage.get_do, do_number)
+    if existing is None:
+        return _error(404, "DO tidak ditemukan")
+    merged = {k: v for k, v in existing.items() if k not in ("No", "Month")}
+    merged.update(body)
+    merged["NOMOR DO"] = do_number  # Nomor DO tidak bisa diganti lewat update
+    row, errors = await run_in_threadpool(validate_record, merged)
+    if errors:
+        return _error(422, "Data DO tidak valid", errors)
+    await run_in_threadpool(storage.upsert_do, row)
+    return JSONResponse(await run_in_threadpool(storage.get_do, do_number))
+
+
+async def delete_do(request):
+    deleted = await run_in_threadpool(request.app.state.storage.delete_do, request.path_params["nomor"])
+    return Response(status_code=204) if deleted else _error(404, "DO tidak ditemukan")
+
+
+async def get_pdf(request):
+    do_number = request.path_params["nomor"]
+    record = await run_in_threadpool(request.app.state.storage.get_do, do_number)
+    if record is None:
+        return _error(404, "DO tidak ditemukan")
+    loop = asyncio.get_running_loop()
+    with metrics.timed("api.pdf"):
+        _, pdf_bytes, error = await loop.run_in_executor(request.app.state.pdf_pool, render_one, record)
+    if error:
+        return _error(500, f"Gagal membuat PDF: {error}")
+    return Response(
+        pdf_bytes, media_type="application/pdf",
+        headers={"Content-Disposition": f'inline; filename="{pdf_filename(do_number)}"'},
+    )
+
+
+async def prometheus(request):
+    return PlainTextResponse(metrics.to_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+def create_app(db_path=SQLITE_PATH, pdf_workers=None):
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        # 'spawn': proses render tidak mewarisi thread/koneksi milik server
+        app.state.pdf_pool = ProcessPoolExecutor(
+            max_workers=pdf_workers or os.cpu_count() or 1, mp_context=multiprocessing.get_context("spawn")
+        )
+        try:
+            yield
+        finally:
+            app.state.pdf_pool.shutdown(cancel_futures=True)
+
+    app = Starlette(
+        routes=[
+            Route("/health", health, methods=["GET"]),
+            Route("/metrics", prometheus, methods=["GET"]),
+            Route("/do/reserve", reserve_number, methods=["POST"]),
+            Route("/do/reserve/{nomor}", release_number, methods=["DELETE"]),
+            Route("/do", create_do, methods=["POST"]),
+            Route("/do/{nomor}", get_do, methods=["GET"]),
+            Route("/do/{nomor}", update_do, methods=["PUT"]),
+            Route("/do/{nomor}", delete_do, methods=["DELETE"]),
+            Route("/do/{nomor}/pdf", get_pdf, methods=["GET"]),
+        ],
+        lifespan=lifespan,
+    )
+    app.state.storage = get_storage(db_path)
+    return app
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="HTTP API Surat Jalan")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--db", default=SQLITE_PATH, help=f"File database SQLite (default: {SQLITE_PATH})")
+    parser.add_argument("--pdf-workers", type=int, help="Jumlah proses render PDF (default: semua core CPU)")
+    parser.add_argument("--log-level", default="warning")
+    args = parser.parse_args(argv)
+    uvicorn.run(create_app(args.db, args.pdf_workers), host=args.host, port=args.port, log_level=args.log_level)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""Benchmark alur DO tanpa Streamlit.
+
+Membuat riwayat DO sintetis (kolom NEW_COLUMNS) dengan beberapa ukuran lalu
+mengukur operasi yang dipakai halaman:
+
+- load_database      : muat data penuh (cold) dan cek versi cache (warm)
+- get_next_do_number : pesan + lepas nomor DO berikutnya
+- upsert             : simpan DO baru / edit DO lama + sinkron cache
+- delete_old_data    : hapus DO + sinkron cache
+- rekap_filter       : bangun index filter, lalu filter Bulan + Client + Tanggal
+- build_pdf_sha      : render satu Surat Jalan ke memori
+- page_imports       : waktu import modul tiap halaman (proses baru, Streamlit
+                       dan pandas sudah dimuat seperti di server) dan apakah
+                       ReportLab ikut termuat
+
+Hasil ditulis sebagai JSON agar bisa dibandingkan antar versi:
+
+    python benchmark.py --sizes 1000 10000 100000 --output hasil_benchmark.json
+"""
+import argparse
+import ast
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+from core.data import DataCache  # noqa: E402
+from core.filters import FilterIndex, intersect  # noqa: E402
+from core.storage import SQLiteStorage  # noqa: E402
+
+CLIENTS = [f"PT. Client {i:02d}" for i in range(40)]
+DO_PER_DAY = 30
+
+
+def synthetic_rows(size, seed=42):
+    """Riwayat DO sintetis: DO_PER_DAY DO per hari, mundur dari hari ini."""
+    rng = random.Random(seed)
+    start = datetime.now() - timedelta(days=size // DO_PER_DAY + 1)
+    rows = []
+    for i in range(size):
+        day = start + timedelta(days=i // DO_PER_DAY)
+        rows.append({
+            "NOMOR DO": f"{day:%d%m%y}-{i % DO_PER_DAY + 1:02d}",
+            "Date": day.strftime("%Y-%m-%d"),
+            "Month": day.strftime("%B"),
+            "Tgl PO": day.strftime("%Y-%m-%d"),
+            "Qty": float(rng.choice([8000, 16000, 24000])),
+            "Jenis BBM": rng.choice(["Biosolar Industri B40", "Pertamina Dex"]),
+            "Transportir": "PT. SHA Solo",
+            "SPO-Letter": f"SPO-{i}", "Source": "TBBM Boyolali", "PO Pertamina": f"PP-{i}",
+            "PIC Delivery": f"PIC {rng.randrange(100)}", "Fleet Number": f"AD {rng.randrange(9999)} XX",
+            "Nama Driver": f"Driver {rng.randrange(200)}", "Keterangan": "" if i % 3 else None,
+            "Client": rng.choice(CLIENTS),
+            "Site/Discharge Addr Line 1": f"Site {rng.randrange(300)}", "Site/Discharge Addr Line 2": "Jawa Tengah",
+            "PO Client": f"PO-{i}",
+        })
+    return rows
+
+
+def measure(func, repeat, setup=None):
+    """Jalankan `func` `repeat` kali; kembalikan statistik durasi dalam milidetik."""
+    timings = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        t0 = time.perf_counter()
+        func(arg) if setup else func()
+        timings.append((time.perf_counter() - t0) * 1000)
+    timings.sort()
+    return {
+        "repeat": repeat,
+        "min_ms": round(timings[0], 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        "max_ms": round(timings[-1], 3),
+    }
+
+
+def bench_size(size, repeat, workdir):
+    db_path = os.path.join(workdir, f"bench_{size}.sqlite3")
+    storage = SQLiteStorage(db_path, import_from=None)
+    t0 = time.perf_counter()
+    storage.insert_many(synthetic_rows(size))
+    results = {"rows": size, "generate_ms": round((time.perf_counter() - t0) * 1000, 3)}
+
+    cache = DataCache(storage)
+    results["load_database_cold"] = measure(lambda: DataCache(storage).get(), max(1, repeat // 5))
+    cache.get()
+    results["load_database_warm"] = measure(cache.get, repeat)
+
+    results["get_next_do_number"] = measure(
+        lambda: storage.release_do_number(storage.reserve_do_number()), repeat
+    )
+
+    counter = iter(range(10**9))
+    template = synthetic_rows(1, seed=7)[0]
+
+    def new_row():
+        return dict(template, **{"NOMOR DO": storage.reserve_do_number()})
+
+    def upsert(row):
+        storage.upsert_do(row)
+        cache.get()
+
+    results["upsert_new"] = measure(upsert, repeat, setup=new_row)
+    existing = cache.get().options()[-500:]  # 500 DO paling lama (options urut menurun)
+    results["upsert_edit"] = measure(
+        upsert, repeat,
+        setup=lambda: dict(template, **{"NOMOR DO": existing[next(counter) % len(existing)], "Qty": 1000.0}),
+    )
+
+    def delete(do_number):
+        storage.delete_do(do_number)
+        cache.get()
+
+    def saved_row():
+        row = new_row()
+        storage.upsert_do(row)
+        cache.get()
+        return row["NOMOR DO"]
+
+    results["delete_old_data"] = measure(delete, repeat, setup=saved_row)
+
+    dataset = cache.get()
+    frame = dataset.frame
+    months = sorted(frame["Month"].dropna().unique())[:3]
+    last_date = frame["Date"].max()
+
+    def rekap_filter(fidx):
+        positions = fidx.by_months(months)
+        positions = intersect(positions, fidx.by_client(CLIENTS[0]))
+        positions = intersect(positions, fidx.by_date(last_date - timedelta(days=60), last_date))
+        return fidx.take(positions)
+
+    results["rekap_filter_index_build"] = measure(lambda: FilterIndex(frame), max(1, repeat // 5))
+    results["rekap_filter"] = measure(rekap_filter, repeat, setup=lambda: dataset.filters)
+    return results
+
+
+def bench_pdf(repeat, header):
+    from core import pdf
+
+    if header and os.path.exists(header):
+        os.makedirs(pdf.ASSETS_FOLDER, exist_ok=True)
+        shutil.copy(header, os.path.join(pdf.ASSETS_FOLDER, "sha.jpg"))
+    row = synthetic_rows(1)[0]
+
+    def render():
+        buffer = io.BytesIO()
+        pdf.build_pdf_sha(row, buffer)
+        return buffer
+
+    t0 = time.perf_counter()
+    size = len(render().getvalue())
+    return {
+        "cold_ms": round((time.perf_counter() - t0) * 1000, 3),
+        "warm": measure(render, repeat),
+        "pdf_bytes": size,
+        "header": bool(header and os.path.exists(header)),
+    }
+
+
+# Server Streamlit sudah memuat modul ini sebelum halaman pertama dijalankan
+PRELOADED = "import streamlit, pandas"
+IMPORT_PROBE = """
+import sys, time
+{preloaded}
+t0 = time.perf_counter()
+{imports}
+print((time.perf_counter() - t0) * 1000, "reportlab" in sys.modules)
+"""
+
+
+def page_imports(path):
+    """Statement import level atas sebuah halaman (tanpa menjalankan kode Streamlit-nya)."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def bench_imports(repeat):
+    pages = [os.path.join(ROOT, "App.py")] + sorted(
+        os.path.join(ROOT, "pages", name) for name in os.listdir(os.path.join(ROOT, "pages")) if name.endswith(".py")
+    )
+    results = {}
+    for path in pages:
+        code = IMPORT_PROBE.format(preloaded=PRELOADED, imports="\n".join(page_imports(path)))
+        timings, reportlab_loaded = [], False
+        for _ in range(repeat):
+            out = subprocess.run(
+                [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+            ).stdout.split()
+            timings.append(float(out[0]))
+            reportlab_loaded = out[1] == "True"
+        results[os.path.relpath(path, ROOT)] = {
+            "median_ms": round(statistics.median(timings), 3),
+            "min_ms": round(min(timings), 3),
+            "reportlab_loaded": reportlab_loaded,
+        }
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import pandas
+    import reportlab
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "pandas": pandas.__version__,
+        "reportlab": reportlab.Version,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark alur DO (tanpa Streamlit)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=20, help="Jumlah pengulangan per operasi")
+    parser.add_argument("--header", default=os.path.join(ROOT, "sha.jpg"), help="Gambar header PDF ('' = tanpa)")
+    parser.add_argument("--output", help="Tulis JSON ke file ini (default: stdout)")
+    args = parser.parse_args(argv)
+
+    report = {"environment": environment(), "page_imports": bench_imports(max(1, min(args.repeat, 5))), "sizes": {}}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="bench_do_") as workdir:
+        # assets/ dan config dibaca relatif ke cwd: jalankan di folder terpisah
+        os.chdir(workdir)
+        try:
+            for size in args.sizes:
+                print(f"Benchmark {size} baris...", file=sys.stderr)
+                report["sizes"][str(size)] = bench_size(size, args.repeat, workdir)
+            report["build_pdf_sha"] = bench_pdf(args.repeat, args.header)
+        finally:
+            os.chdir(cwd)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""Perintah baris (tanpa Streamlit) untuk cron dan job ekspor ERP.
+
+Memakai logika core/ yang sama dengan halaman aplikasi:
+
+    python cli.py create order.csv --render           # DO baru dari CSV/JSON/XLSX (+ PDF)
+    python cli.py render --start 2025-10-01 --end 2025-10-31
+    python cli.py render --start 2025-10-25 --merged print_run.pdf
+    python cli.py export rekap.parquet --start 2025-10-01 --client "PT. ABC"
+    python cli.py backup [--force] [--list]
+
+Jalankan dari folder aplikasi: header di assets/ dan config_identitas.json
+dibaca relatif ke folder kerja, sama seperti saat `streamlit run App.py`.
+Hasil ringkas ditulis ke stdout sebagai JSON; pesan error ke stderr.
+Kode keluar: 0 sukses, 1 ada baris/DO yang gagal, 2 argumen atau file salah.
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import date
+
+from core.schema import SQLITE_PATH
+
+
+def _date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"tanggal harus YYYY-MM-DD: {value!r}")
+
+
+def _print(result):
+    print(json.dumps(result, indent=2, ensure_ascii=False, default=str))
+
+
+def _progress(quiet):
+    if quiet:
+        return None
+
+    def report(done, total):
+        print(f"\r{done} / {total} DO selesai dirender", end="\n" if done == total else "", file=sys.stderr)
+    return report
+
+
+def _select(storage, start=None, end=None, client=None):
+    """(frame, posisi baris) untuk rentang tanggal / client, urut Tanggal lalu NOMOR DO."""
+    from core.filters import FilterIndex, intersect
+
+    fidx = FilterIndex(storage.load_frame())
+    positions = None
+    if start or end:
+        bounds = fidx.date_bounds()
+        if bounds is None:
+            return fidx.frame, []
+        positions = fidx.by_date(start or bounds[0], end or bounds[1])
+    if client:
+        positions = intersect(positions, fidx.by_client(client))
+    positions = fidx.sort(positions, "NOMOR DO")
+    positions = fidx.sort(positions, "Date")  # Stabil: NOMOR DO tetap urut di tanggal yang sama
+    return fidx.frame, positions
+
+
+# --- Perintah ---
+def cmd_create(args, storage):
+    from core.importer import REQUIRED_COLUMNS, read_table, suggest_mapping, validate
+
+    with open(args.file, "rb") as f:
+        raw = read_table(f, args.file)
+    mapping = suggest_mapping(raw.columns)
+    missing = [col for col in REQUIRED_COLUMNS if not mapping.get(col)]
+    if missing:
+        print(f"Kolom wajib tidak ditemukan di file: {', '.join(missing)}", file=sys.stderr)
+        return 2
+    rows, errors = validate(raw, mapping, storage)
+    result = {"valid": len(rows), "errors": errors.to_dict("records")}
+    if len(errors) and not args.skip_invalid:
+        result["created"] = []
+        _print(result)
+        print(f"{len(errors)} masalah ditemukan, tidak ada DO yang disimpan (pakai --skip-invalid untuk "
+              "menyimpan baris yang valid saja).", file=sys.stderr)
+        return 1
+    if args.dry_run or rows.empty:
+        result["created"] = []
+        _print(result)
+        return 0
+
+    numbers = storage.insert_many(rows.to_dict("records"))
+    result["created"] = numbers
+    status = 1 if len(errors) else 0
+    if args.render:
+        from core.batch import render_pdf_files
+
+        records = [storage.get_do(nomor) for nomor in numbers]
+        paths, render_errors = render_pdf_files(records, args.output_dir, args.workers, _progress(args.quiet))
+        result["pdf"] = paths
+        result["pdf_errors"] = [{"NOMOR DO": n, "Pesan": m} for n, m in render_errors]
+        status = status or (1 if render_errors else 0)
+    _print(result)
+    return status
+
+
+def cmd_render(args, storage):
+    from core.batch import render_pdf_files, render_pdf_merged
+
+    frame, positions = _select(storage, args.start, args.end, args.client)
+    rows = frame.iloc[positions].to_dict("records")
+    if not rows:
+        _print({"rendered": 0})
+        return 0
+    if args.merged:
+        from core.pdf import write_pdf_file
+
+        pdf_bytes, errors = render_pdf_merged(rows)
+        result = {"rendered": len(rows) - len(errors), "pdf": write_pdf_file(pdf_bytes, args.merged) if pdf_bytes else None}
+    else:
+        paths, errors = render_pdf_files(rows, args.output_dir, args.workers, _progress(args.quiet))
+        result = {"rendered": len(paths), "folder": args.output_dir}
+    result["errors"] = [{"NOMOR DO": n, "Pesan": m} for n, m in errors]
+    _print(result)
+    return 1 if errors else 0
+
+
+def cmd_export(args, storage):
+    from core.export import FORMATS
+
+    by_ext = {ext: writer for ext, _, writer in FORMATS.values()}
+    ext = (args.format or os.path.splitext(args.output)[1].lstrip(".")).lower()
+    if ext not in by_ext:
+        print(f"Format tidak dikenal: {ext!r} (pilih {', '.join(by_ext)})", file=sys.stderr)
+        return 2
+    frame, positions = _select(storage, args.start, args.end, args.client)
+    tmp = f"{args.output}.tmp"
+    with open(tmp, "wb") as f:
+        by_ext[ext](frame, positions, f)
+    os.replace(tmp, args.output)
+    _print({"rows": len(positions) if positions is not None else len(frame), "file": args.output})
+    return 0
+
+
+def cmd_backup(args, storage):
+    from core.backup import BackupManager
+
+    manager = BackupManager(storage, args.folder)
+    if args.list:
+        _print([
+            {k: manifest[k] for k in ("id", "created_at", "data_version", "row_count", "bytes_written")}
+            for manifest in map(manager.manifest, manager.snapshot_ids())
+        ])
+        return 0
+    manifest = manager.backup(force=args.force)
+    if manifest is None:
+        _print({"backup": None, "pesan": "Data tidak berubah sejak backup terakhir"})
+    else:
+        _print({"backup": manifest["id"], "rows": manifest["row_count"], "bytes_written": manifest["bytes_written"]})
+    return 0
+
+
+def build_parser():
+    from core.backup import BACKUP_DIR
+    from core.pdf import PDF_FOLDER
+
+    parser = argparse.ArgumentParser(description="Surat Jalan tanpa Streamlit (cron / ERP)")
+    parser.add_argument("--db", default=SQLITE_PATH, help=f"File database SQLite (default: {SQLITE_PATH})")
+    parser.add_argument("--quiet", action="store_true", help="Tanpa progres di stderr")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_workers(p):
+        p.add_argument("--workers", type=int, help="Jumlah proses render (default: semua core CPU)")
+        p.add_argument("--output-dir", default=PDF_FOLDER, help=f"Folder PDF (default: {PDF_FOLDER})")
+
+    def add_filters(p):
+        p.add_argument("--start", type=_date, help="Tanggal DO awal (YYYY-MM-DD, inklusif)")
+        p.add_argument("--end", type=_date, help="Tanggal DO akhir (YYYY-MM-DD, inklusif)")
+        p.add_argument("--client", help="Hanya DO untuk client ini")
+
+    p = sub.add_parser("create", help="Buat DO dari file CSV / JSON / XLSX")
+    p.add_argument("file")
+    p.add_argument("--render", action="store_true", help="Langsung buat PDF untuk DO baru")
+    p.add_argument("--dry-run", action="store_true", help="Hanya validasi, tidak menyimpan")
+    p.add_argument("--skip-invalid", action="store_true", help="Simpan baris valid meski ada baris yang gagal")
+    add_workers(p)
+    p.set_defaults(func=cmd_create)
+
+    p = sub.add_parser("render", help="Render ulang PDF untuk rentang tanggal")
+    add_filters(p)
+    add_workers(p)
+    p.add_argument("--merged", metavar="FILE", help="Tulis semua DO ke satu PDF (print run) alih-alih per file")
+    p.set_defaults(func=cmd_render)
+
+    p = sub.add_parser("export", help="Export data rekap ke CSV / XLSX / Parquet")
+    p.add_argument("output", help="File tujuan; format dari ekstensi jika --format tidak diisi")
+    p.add_argument("--format", choices=["csv", "xlsx", "parquet"])
+    add_filters(p)
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("backup", help="Buat snapshot backup (hanya jika data berubah)")
+    p.add_argument("--force", action="store_true", help="Tetap buat snapshot meski data tidak berubah")
+    p.add_argument("--list", action="store_true", help="Tampilkan daftar snapshot")
+    p.add_argument("--folder", default=BACKUP_DIR, help=f"Folder backup (default: {BACKUP_DIR})")
+    p.set_defaults(func=cmd_backup)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    from core.storage import SQLiteStorage
+
+    try:
+        storage = SQLiteStorage(args.db)
+    except Exception as e:
+        print(f"Gagal membuka database {args.db}: {e}", file=sys.stderr)
+        return 2
+    try:
+        return args.func(args, storage)
+    except (OSError, ValueError) as e:
+        print(f"{type(e).__name__}: {e}", file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Logika inti Fuel Delivery System yang dipakai bersama oleh semua halaman."""
@@ -0,0 +1,275 @@
+"""Backup data DO: inkremental, terkompresi, dan ter-deduplikasi.
+
+Struktur folder backup:
+
+- `chunks/<sha256>.json.gz`: isi semua DO dengan prefix nomor yang sama
+  (satu hari penerbitan, DDMMYY), dikompres gzip. Nama file = hash isi,
+  sehingga potongan yang tidak berubah tidak pernah ditulis dua kali.
+- `snapshots/<YYYYmmddTHHMMSS_ffffff>.json`: manifest kecil berisi daftar
+  {prefix: hash chunk} dan versi data saat backup.
+
+Backup berikutnya hanya membaca prefix yang berubah sejak versi data backup
+terakhir (dari `change_log`), lalu menyalin hash prefix lain dari manifest
+sebelumnya. Restore ke suatu waktu cukup memilih manifest lewat nama filenya
+lalu membaca chunk yang dirujuknya saja.
+
+Backup, prune dan restore memegang kunci file `<folder>/.lock`, sehingga
+`cli.py backup` dan worker backup aplikasi tidak saling menghapus chunk yang
+belum tercatat di manifest.
+"""
+import bisect
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+from core.schema import NEW_COLUMNS
+from core.storage import do_prefix, get_storage
+
+logger = logging.getLogger(__name__)
+
+BACKUP_DIR = "backup_data"
+BACKUP_INTERVAL_SECONDS = 3600   # Backup terjadwal (dilewati jika data tidak berubah)
+# Retensi: sejumlah snapshot terakhir, plus snapshot terbaru per jam / hari / bulan
+# untuk sejumlah periode terakhir
+KEEP_LAST = 10
+KEEP_HOURLY = 24
+KEEP_DAILY = 30
+KEEP_MONTHLY = 12
+ID_FORMAT = "%Y%m%dT%H%M%S_%f"
+_KEY = NEW_COLUMNS.index("NOMOR DO")
+
+
+def _write_atomic(path, data):
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+@contextmanager
+def _file_lock(path):
+    """Kunci eksklusif antar proses selama blok berjalan (menunggu jika sedang dipegang)."""
+    with open(path, "a+b") as f:
+        if os.name == "nt":
+            while True:
+                try:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK menyerah setelah ~10 detik: coba lagi
+                    pass
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == "nt":
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def snapshot_time(snapshot_id):
+    return datetime.strptime(snapshot_id, ID_FORMAT)
+
+
+def select_retained(snapshot_ids, last=KEEP_LAST, hourly=KEEP_HOURLY, daily=KEEP_DAILY, monthly=KEEP_MONTHLY):
+    """Snapshot yang dipertahankan kebijakan retensi (`snapshot_ids` urut dari yang terlama)."""
+    keep = set(snapshot_ids[-max(last, 1):])
+    for fmt, count in [("%Y%m%d%H", hourly), ("%Y%m%d", daily), ("%Y%m", monthly)]:
+        periods = set()
+        for snapshot_id in reversed(snapshot_ids):
+            period = snapshot_time(snapshot_id).strftime(fmt)
+            if period not in periods:
+                if len(periods) >= count:
+                    break
+                periods.add(period)
+                keep.add(snapshot_id)
+    return keep
+
+
+class BackupManager:
+    def __init__(self, storage, folder=BACKUP_DIR):
+        self.storage = storage
+        self.folder = folder
+        self.chunk_dir = os.path.join(folder, "chunks")
+        self.snapshot_dir = os.path.join(folder, "snapshots")
+        self.lock_path = os.path.join(folder, ".lock")
+        os.makedirs(self.chunk_dir, exist_ok=True)
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._force = False
+        self._worker = None
+        self.last_error = None
+
+    # --- Snapshot ---
+    def snapshot_ids(self):
+        """Id snapshot terurut dari yang terlama (urutan nama = urutan waktu)."""
+        return sorted(name[:-5] for name in os.listdir(self.snapshot_dir) if name.endswith(".json"))
+
+    def manifest(self, snapshot_id):
+        with open(os.path.join(self.snapshot_dir, f"{snapshot_id}.json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    def find(self, when):
+        """Id snapshot terakhir pada atau sebelum `when` (datetime), atau None."""
+        ids = self.snapshot_ids()
+        i = bisect.bisect_right(ids, when.strftime(ID_FORMAT))
+        return ids[i - 1] if i else None
+
+    def _write_chunk(self, rows):
+        rows = sorted(rows, key=lambda r: r[_KEY])
+        raw = json.dumps({"columns": NEW_COLUMNS, "rows": rows}, ensure_ascii=False, default=str).encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        path = os.path.join(self.chunk_dir, f"{digest}.json.gz")
+        if os.path.exists(path):
+            return digest, 0
+        data = gzip.compress(raw, compresslevel=9, mtime=0)
+        _write_atomic(path, data)
+        return digest, len(data)
+
+    def _read_chunk(self, digest):
+        with gzip.open(os.path.join(self.chunk_dir, f"{digest}.json.gz"), "rb") as f:
+            chunk = json.loads(f.read())
+        columns = chunk["columns"]
+        # Urutkan ulang kolom jika skema berubah sejak backup dibuat
+        index = [columns.index(c) if c in columns else None for c in NEW_COLUMNS]
+        return [tuple(row[i] if i is not None else None for i in index) for row in chunk["rows"]]
+
+    @contextmanager
+    def _locked(self):
+        # Kunci thread (sesi lain di proses ini) lalu kunci file (proses lain: CLI, server lain)
+        with self._lock, _file_lock(self.lock_path):
+            yield
+
+    def backup(self, force=False):
+        """Buat snapshot baru. Mengembalikan manifest, atau None jika data tidak berubah."""
+        with self._locked():
+            return self._backup_locked(force)
+
+    def _backup_locked(self, force):
+        # Pemanggil memegang `_locked()`
+        ids = self.snapshot_ids()
+        previous = self.manifest(ids[-1]) if ids else None
+        since = previous["data_version"] if previous else None
+        version, prefixes, rows = self.storage.read_prefixes_since(since)
+        if previous and not prefixes and prefixes is not None and not force:
+            return None
+
+        # Backup penuh (prefixes None) mulai dari kosong; inkremental menyalin manifest lama
+        chunks = {} if prefixes is None else dict(previous["chunks"])
+        counts = {} if prefixes is None else dict(previous["counts"])
+        grouped = {prefix: [] for prefix in (prefixes or ())}
+        for row in rows:
+            grouped.setdefault(do_prefix(row[_KEY]), []).append(row)
+        written = 0
+        for prefix, prefix_rows in grouped.items():
+            if prefix_rows:
+                chunks[prefix], size = self._write_chunk(prefix_rows)
+                counts[prefix] = len(prefix_rows)
+                written += size
+            else:
+                # Semua DO di prefix ini sudah dihapus
+                chunks.pop(prefix, None)
+                counts.pop(prefix, None)
+
+        now = datetime.now()
+        snapshot_id = now.strftime(ID_FORMAT)
+        manifest = {
+            "id": snapshot_id,
+            "created_at": now.isoformat(timespec="seconds"),
+            "data_version": version,
+            "row_count": sum(counts.values()),
+            "counts": counts,
+            "chunks": chunks,
+            "bytes_written": written,
+        }
+        _write_atomic(
+            os.path.join(self.snapshot_dir, f"{snapshot_id}.json"),
+            json.dumps(manifest, ensure_ascii=False).encode("utf-8"),
+        )
+        self._prune()
+        return manifest
+
+    def _prune(self):
+        ids = self.snapshot_ids()
+        keep = select_retained(ids)
+        for snapshot_id in ids:
+            if snapshot_id not in keep:
+                os.remove(os.path.join(self.snapshot_dir, f"{snapshot_id}.json"))
+        # Chunk yang tidak lagi dirujuk snapshot mana pun ikut dihapus
+        referenced = set()
+        for snapshot_id in keep:
+            referenced.update(self.manifest(snapshot_id)["chunks"].values())
+        for name in os.listdir(self.chunk_dir):
+            if name.endswith(".json.gz") and name[:-8] not in referenced:
+                os.remove(os.path.join(self.chunk_dir, name))
+
+    def restore(self, snapshot_id):
+        """Kembalikan data DO ke isi snapshot. Data saat ini di-backup dulu. Mengembalikan jumlah baris."""
+        with self._locked():
+            manifest = self.manifest(snapshot_id)
+            records = [row for digest in manifest["chunks"].values() for row in self._read_chunk(digest)]
+            records.sort(key=lambda r: (r[NEW_COLUMNS.index("No")] is None, r[NEW_COLUMNS.index("No")] or 0))
+            self._backup_locked(force=False)  # Titik aman sebelum restore (bisa di-restore balik)
+            return self.storage.replace_all(records)
+
+    def folder_size(self):
+        return sum(
+            os.path.getsize(os.path.join(d, name))
+            for d in (self.chunk_dir, self.snapshot_dir) for name in os.listdir(d)
+        )
+
+    # --- Jadwal (thread latar belakang) ---
+    def request_backup(self, force=True):
+        """Minta backup dikerjakan worker (tanpa menunggu)."""
+        self._force = self._force or force
+        self.start()
+        self._wakeup.set()
+
+    def start(self, interval=BACKUP_INTERVAL_SECONDS):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, args=(interval,), name="backup-worker", daemon=True)
+            self._worker.start()
+
+    def _run(self, interval):
+        ids = self.snapshot_ids()
+        next_run = snapshot_time(ids[-1]).timestamp() + interval if ids else 0
+        while True:
+            self._wakeup.wait(timeout=max(0.0, next_run - time.time()))
+            self._wakeup.clear()
+            force, self._force = self._force, False
+            next_run = time.time() + interval
+            try:
+                self.backup(force=force)
+                self.last_error = None
+            except Exception as e:  # Worker tidak boleh mati karena satu error
+                logger.exception("Backup gagal")
+                self.last_error = f"{type(e).__name__}: {e}"
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_backup_manager(storage=None, folder=BACKUP_DIR):
+    """Backup manager bersama per database; backup terjadwal langsung berjalan."""
+    storage = storage or get_storage()
+    with _managers_lock:
+        if storage.path not in _managers:
+            _managers[storage.path] = BackupManager(storage, folder)
+            _managers[storage.path].start()
+        return _managers[storage.path]
@@ -0,0 +1,114 @@
+"""Cetak massal Surat Jalan.
+
+- `render_pdf_batch`: render banyak DO paralel lalu kemas jadi satu ZIP (satu
+  PDF per DO). Setiap DO dirender di proses worker terpisah
+  (ProcessPoolExecutor) sehingga memakai semua core CPU.
+- `render_pdf_files`: seperti ZIP, tetapi tiap PDF langsung ditulis ke folder
+  (dipakai CLI untuk render ulang arsip).
+- `render_pdf_merged`: print run, semua DO dalam satu PDF multi-halaman
+  yang bisa dicetak sebagai satu job.
+
+Error satu DO hanya dicatat, tidak menggagalkan batch.
+"""
+import io
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from core.pdf import build_pdf_sha, pdf_filename, render_print_run, write_pdf_file
+from core.schema import DATE_COLUMNS
+
+
+def _clean_row(row):
+    """Ganti nilai kosong (NaN/None) dari database menjadi string kosong seperti data form."""
+    clean = {}
+    for key, value in dict(row).items():
+        if key not in DATE_COLUMNS and key != "Qty" and (value is None or (not isinstance(value, str) and pd.isna(value))):
+            value = ""
+        clean[key] = value
+    return clean
+
+
+def render_one(row):
+    """Render satu DO ke bytes. Mengembalikan (nomor_do, pdf_bytes, pesan_error)."""
+    do_number = str(row.get("NOMOR DO", ""))
+    try:
+        buffer = io.BytesIO()
+        build_pdf_sha(_clean_row(row), buffer)
+        return do_number, buffer.getvalue(), None
+    except Exception as e:
+        return do_number, None, f"{type(e).__name__}: {e}"
+
+
+def _iter_rendered(rows, max_workers):
+    """Render `rows` (paralel jika perlu); hasil render_one dikembalikan sesuai urutan selesai."""
+    total = len(rows)
+    max_workers = max_workers or os.cpu_count() or 1
+    if total <= 1 or max_workers == 1:
+        for row in rows:
+            yield render_one(row)
+        return
+    # 'spawn' aman dipakai dari server Streamlit yang multi-thread
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(max_workers, total), mp_context=ctx) as pool:
+        futures = {pool.submit(render_one, row): row for row in rows}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:  # Worker mati (mis. kehabisan memori)
+                yield str(futures[future].get("NOMOR DO", "")), None, f"{type(e).__name__}: {e}"
+
+
+def render_pdf_batch(rows, max_workers=None, progress=None):
+    """Render banyak DO dan kembalikan (zip_bytes, daftar_error).
+
+    `rows` adalah list dict (mis. `df.to_dict("records")`). `progress(selesai, total)`
+    dipanggil setiap satu DO selesai. `daftar_error` berisi tuple (nomor_do, pesan).
+    """
+    rows = [dict(r) for r in rows]
+    total = len(rows)
+    errors = []
+    zip_buffer = io.BytesIO()
+
+    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for done, (do_number, pdf_bytes, error) in enumerate(_iter_rendered(rows, max_workers), start=1):
+            if error:
+                errors.append((do_number, error))
+            else:
+                zf.writestr(pdf_filename(do_number), pdf_bytes)
+            if progress:
+                progress(done, total)
+
+        if errors:
+            zf.writestr("ERROR.txt", "\n".join(f"{nomor}: {pesan}" for nomor, pesan in errors))
+
+    return zip_buffer.getvalue(), errors
+
+
+def render_pdf_files(rows, folder, max_workers=None, progress=None):
+    """Render banyak DO ke `folder` (satu file per DO, menimpa file lama).
+
+    Mengembalikan (daftar_path, daftar_error) dengan `progress` seperti `render_pdf_batch`.
+    """
+    rows = [dict(r) for r in rows]
+    total = len(rows)
+    paths, errors = [], []
+    for done, (do_number, pdf_bytes, error) in enumerate(_iter_rendered(rows, max_workers), start=1):
+        if error:
+            errors.append((do_number, error))
+        else:
+            paths.append(write_pdf_file(pdf_bytes, os.path.join(folder, pdf_filename(do_number))))
+        if progress:
+            progress(done, total)
+    return paths, errors
+
+
+def render_pdf_merged(rows):
+    """Render banyak DO ke satu PDF (urutan halaman = urutan `rows`).
+
+    Mengembalikan (pdf_bytes atau None, daftar_error) seperti `render_pdf_batch`.
+    """
+    return render_print_run([_clean_row(r) for r in rows])
@@ -0,0 +1,53 @@
+"""Identitas perusahaan (config_identitas.json) yang dibaca sekali dan dipakai bersama.
+
+File JSON hanya dibaca ulang jika mtime/ukurannya berubah, sehingga
+perubahan dari halaman Pengaturan langsung terlihat di semua halaman dan di
+PDF tanpa restart, tanpa membaca file di setiap rerun.
+"""
+import json
+import os
+import threading
+
+CONFIG_PATH = "config_identitas.json"  # File untuk menyimpan data identitas perusahaan
+DEFAULT_CONFIG = {
+    "Nama Perusahaan": "PT. SHA SOLO",
+    "Alamat 1": "Jl. Yosodipuro No. 21 Surakarta 57131",
+    "Telepon": "0271-644987 (Hunting) / 081-325-999-999",
+    "Email": "sha@shasolo.com / marketing@shasolo.com",
+    "Website": "www.shasolo.com",
+}
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _file_key(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_config(path=CONFIG_PATH):
+    """Data identitas perusahaan (salinan; default jika file belum ada)."""
+    key = _file_key(path)
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is None or cached[0] != key:
+            config = dict(DEFAULT_CONFIG)
+            if key is not None:
+                with open(path, "r", encoding="utf-8") as f:
+                    config.update(json.load(f))
+            cached = _cache[path] = (key, config)
+        return dict(cached[1])
+
+
+def save_config(config_data, path=CONFIG_PATH):
+    """Simpan identitas perusahaan; cache otomatis diperbarui di pemanggilan berikutnya."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(config_data, f, indent=4)
+    os.replace(tmp_path, path)
+    with _cache_lock:
+        _cache.pop(path, None)
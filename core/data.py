@@ -0,0 +1,144 @@
+"""Akses data bersama untuk semua halaman dan sesi, di-cache per versi data.
+
+Satu proses Streamlit hanya mem-parse data satu kali per versi storage
+(lihat `change_log` di core/storage.py). Setiap pemanggilan `get_dataset()`
+hanya membaca nomor versi; jika ada perubahan kecil (dari halaman mana pun,
+worker job, atau proses lain) baris yang berubah saja yang diterapkan ke
+index, dan jika perubahannya besar seluruh data dimuat ulang sekali.
+
+Rekap bulanan (tabel rollup) ikut di-cache per versi data yang sama; tabel
+itu kecil sehingga cukup dibaca ulang utuh saat versinya berubah.
+
+Halaman membuat satu `RunContext` per rerun (`run_context()`): versi data
+dicek sekali, dan nilai turunan (daftar pilihan DO, saran isian, data
+terakhir) dihitung sekali per versi lalu dipakai bersama semua sesi.
+"""
+import logging
+import threading
+
+from core.index import DOIndex
+from core.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+INCREMENTAL_LIMIT = 500  # Lebih dari ini perubahan, muat ulang penuh lebih murah
+
+
+class DataCache:
+    def __init__(self, storage):
+        self.storage = storage
+        self._lock = threading.Lock()
+        self._index = None
+        self._version = None
+        self._rollup = None
+        self._rollup_version = None
+        self._derived = {}
+        self._derived_version = None
+
+    @property
+    def version(self):
+        return self._version
+
+    def get(self):
+        """DOIndex untuk versi data terbaru."""
+        with self._lock:
+            if self._index is None:
+                self._reload()
+            elif self.storage.data_version() != self._version:
+                changes = self.storage.changes_since(self._version, INCREMENTAL_LIMIT)
+                if changes is None:
+                    self._reload()
+                else:
+                    version, changed = changes
+                    try:
+                        self._apply(changed)
+                    except Exception:
+                        # Index setengah diperbarui: buang dan muat ulang penuh. Versi baru
+                        # dicatat hanya setelah perubahan benar-benar masuk index.
+                        logger.exception("Gagal menerapkan perubahan data, memuat ulang penuh")
+                        self._index = None
+                        self._reload()
+                    else:
+                        self._version = version
+            return self._index
+
+    def _apply(self, changed):
+        for do_number, record in changed.items():
+            if record is None:
+                self._index.delete(do_number)
+        # Urut No storage: DO yang diubah terakhir juga masuk index terakhir
+        for record in sorted(filter(None, changed.values()), key=lambda r: (r["No"] is None, r["No"] or 0)):
+            self._index.upsert(record)
+
+    def rollup(self):
+        """DataFrame rekap per Periode/Month/Client/Jenis BBM untuk versi data terbaru."""
+        with self._lock:
+            if self._rollup is None or self.storage.data_version() != self._rollup_version:
+                self._rollup, self._rollup_version = self.storage.load_rollup_versioned()
+            return self._rollup
+
+    def derived(self, version, key, build):
+        """`build()` yang dihitung sekali per versi data dan dipakai bersama.
+
+        Konteks dengan versi yang sudah lewat tetap mendapat hasil `build()`,
+        tetapi tidak mengisi cache.
+        """
+        with self._lock:
+            if version != self._version:
+                return build()
+            if self._derived_version != version:
+                self._derived, self._derived_version = {}, version
+            if key not in self._derived:
+                self._derived[key] = build()
+            return self._derived[key]
+
+    def _reload(self):
+        df, self._version = self.storage.load_frame_versioned()
+        self._index = DOIndex(df)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_data_cache(storage=None):
+    storage = storage or get_storage()
+    with _caches_lock:
+        if storage.path not in _caches:
+            _caches[storage.path] = DataCache(storage)
+        return _caches[storage.path]
+
+
+def get_dataset(storage=None):
+    """Frame DO + index NOMOR DO terbaru, dipakai bersama semua halaman dan sesi."""
+    return get_data_cache(storage).get()
+
+
+class RunContext:
+    """Data untuk satu rerun halaman: versi dicek sekali, nilai turunan di-memo per versi."""
+
+    def __init__(self, cache):
+        self._cache = cache
+        self.db = cache.get()
+        self.version = cache.version
+        self._saved = {}
+
+    def memo(self, key, build):
+        """Nilai `build(db)` untuk versi data rerun ini (dihitung sekali per versi)."""
+        return self._cache.derived(self.version, key, lambda: build(self.db))
+
+    def is_saved(self, do_number):
+        """True jika DO sudah tersimpan (bukan draft), dicek sekali per rerun."""
+        if do_number not in self._saved:
+            self._saved[do_number] = do_number in self.db
+        return self._saved[do_number]
+
+
+def run_context(storage=None):
+    """Konteks data baru untuk satu rerun; panggil sekali di awal halaman."""
+    return RunContext(get_data_cache(storage))
+
+
+def get_rollup(storage=None):
+    """Rekap liter & jumlah DO per Periode/Month/Client/Jenis BBM, dipakai bersama."""
+    return get_data_cache(storage).rollup()
@@ -0,0 +1,101 @@
+"""Export data rekap ke CSV, XLSX, atau Parquet, ditulis per potongan baris.
+
+File ditulis ke file sementara di disk, `CHUNK_ROWS` baris sekali jalan, sehingga
+memori puncak saat export tidak bergantung pada jumlah baris terpilih:
+
+- CSV: setiap potongan ditambahkan ke file.
+- XLSX: openpyxl mode `write_only` (baris langsung dialirkan ke file), kolom
+  sama dengan dbase.xlsx (NEW_COLUMNS).
+- Parquet: satu row group per potongan lewat `pyarrow.parquet.ParquetWriter`.
+"""
+import io
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from core.schema import DATE_COLUMNS, NEW_COLUMNS
+
+CHUNK_ROWS = 5000
+
+
+def _chunks(frame, positions, chunk_rows):
+    """Potongan frame (kolom NEW_COLUMNS) untuk posisi baris terpilih."""
+    if positions is None:
+        positions = np.arange(len(frame))
+    for start in range(0, len(positions), chunk_rows):
+        yield frame.iloc[positions[start:start + chunk_rows]].reindex(columns=NEW_COLUMNS)
+
+
+def write_csv(frame, positions, target, chunk_rows=CHUNK_ROWS):
+    text = io.TextIOWrapper(target, encoding="utf-8", newline="")
+    header = True
+    for chunk in _chunks(frame, positions, chunk_rows):
+        chunk.to_csv(text, index=False, header=header)
+        header = False
+    if header:  # Tidak ada baris: tetap tulis judul kolom
+        pd.DataFrame(columns=NEW_COLUMNS).to_csv(text, index=False)
+    text.flush()
+    text.detach()
+
+
+def write_xlsx(frame, positions, target, chunk_rows=CHUNK_ROWS):
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")  # Nama sheet bawaan pandas.to_excel seperti dbase.xlsx
+    ws.append(NEW_COLUMNS)
+    for chunk in _chunks(frame, positions, chunk_rows):
+        chunk = chunk.astype(object).where(chunk.notna(), None)
+        for row in chunk.itertuples(index=False, name=None):
+            ws.append([v.to_pydatetime() if isinstance(v, pd.Timestamp) else v for v in row])
+    wb.save(target)
+
+
+def _parquet_schema():
+    import pyarrow as pa
+
+    types = {"No": pa.int64(), "Qty": pa.float64()}
+    types.update({col: pa.timestamp("ns") for col in DATE_COLUMNS})
+    return pa.schema([(col, types.get(col, pa.string())) for col in NEW_COLUMNS])
+
+
+def write_parquet(frame, positions, target, chunk_rows=CHUNK_ROWS):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _parquet_schema()
+    text_columns = [c for c in NEW_COLUMNS if c not in DATE_COLUMNS and c not in ("No", "Qty")]
+    with pq.ParquetWriter(target, schema) as writer:
+        for chunk in _chunks(frame, positions, chunk_rows):
+            # Tipe tetap per kolom agar semua row group cocok dengan skema
+            chunk = chunk.assign(
+                No=pd.to_numeric(chunk["No"], errors="coerce").astype("Int64"),
+                Qty=pd.to_numeric(chunk["Qty"], errors="coerce").astype(float),
+                **{c: chunk[c].map(lambda v: None if pd.isna(v) else str(v)) for c in text_columns},
+            )
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+# Format: (ekstensi, mime, fungsi penulis)
+FORMATS = {
+    "CSV": ("csv", "text/csv", write_csv),
+    "Excel (XLSX)": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", write_xlsx),
+    "Parquet": ("parquet", "application/vnd.apache.parquet", write_parquet),
+}
+
+
+def export_file(fmt, frame, positions=None, chunk_rows=CHUNK_ROWS):
+    """Tulis baris `positions` dari `frame` ke file sementara; kembalikan file (posisi 0).
+
+    File sementara terhapus otomatis saat ditutup.
+    """
+    writer = FORMATS[fmt][2]
+    target = tempfile.TemporaryFile()
+    try:
+        writer(frame, positions, target, chunk_rows)
+        target.seek(0)
+    except BaseException:
+        target.close()
+        raise
+    return target
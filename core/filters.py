@@ -0,0 +1,123 @@
+"""Index filter rekap: dibangun sekali per versi data, dipakai semua rerun.
+
+- Tanggal: posisi baris diurutkan menurut tanggal (tanpa jam), sehingga
+  rentang tanggal dijawab dengan binary search (`searchsorted`).
+- Month & Client: kode kategori, dengan daftar posisi baris per nilai.
+
+Setiap filter menghasilkan array posisi baris (int, urut naik). Filter
+digabung dengan irisan array posisi, lalu frame diambil sekali dengan
+`iloc`, bukan rantai boolean mask yang menyalin frame berkali-kali.
+Pengurutan grid memakai peringkat per kolom (dihitung sekali per versi saat
+kolom itu pertama kali dipakai), sehingga mengurutkan hasil filter cukup
+argsort bilangan bulat pada posisi terpilih.
+"""
+import numpy as np
+import pandas as pd
+
+from core.metrics import timed
+
+
+def intersect(*positions):
+    """Irisan beberapa array posisi (None berarti tanpa filter)."""
+    arrays = sorted((p for p in positions if p is not None), key=len)
+    if not arrays:
+        return None
+    result = arrays[0]
+    for other in arrays[1:]:
+        result = np.intersect1d(result, other, assume_unique=True)
+    return result
+
+
+class FilterIndex:
+    @timed("rekap.filter_index")
+    def __init__(self, df):
+        self.size = len(df)
+        # Frame siap tampil: Keterangan sudah string (data_editor membaca kolom NaN sebagai float)
+        self.frame = df.assign(Keterangan=df["Keterangan"].fillna("").astype(str))
+
+        dates = df["Date"].dt.normalize()
+        valid = np.flatnonzero(dates.notna().to_numpy())
+        self._dates = dates.to_numpy(dtype="datetime64[ns]")
+        values = self._dates[valid]
+        order = np.argsort(values, kind="stable")
+        self._date_positions = valid[order]
+        self._sorted_dates = values[order]
+
+        self._months, self._month_codes, self._month_positions = self._categorize(df["Month"])
+        self._clients, self._client_codes, self._client_positions = self._categorize(df["Client"])
+        self._ranks = {}
+
+    @staticmethod
+    def _categorize(column):
+        codes, categories = pd.factorize(column, sort=True)  # NaN mendapat kode -1
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(categories) + 1))
+        positions = {
+            value: order[bounds[i]:bounds[i + 1]] for i, value in enumerate(categories)
+        }
+        return list(categories), codes, positions
+
+    # --- Pilihan untuk widget ---
+    @property
+    def months(self):
+        return self._months
+
+    def clients(self, positions=None):
+        """Client (terurut) yang muncul di baris `positions` (None = semua)."""
+        if positions is None:
+            return self._clients
+        codes = np.unique(self._client_codes[positions])
+        return [self._clients[c] for c in codes if c >= 0]
+
+    def date_bounds(self, positions=None):
+        """(tanggal_min, tanggal_max) sebagai `date` dari baris `positions`, atau None."""
+        if positions is None:
+            dates = self._sorted_dates
+        else:
+            dates = self._dates[positions]
+            dates = dates[~np.isnat(dates)]
+        if not len(dates):
+            return None
+        return pd.Timestamp(dates.min()).date(), pd.Timestamp(dates.max()).date()
+
+    # --- Filter (masing-masing mengembalikan array posisi urut naik) ---
+    @timed("rekap.filter.bulan")
+    def by_months(self, months):
+        parts = [self._month_positions[m] for m in months if m in self._month_positions]
+        return np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.intp)
+
+    @timed("rekap.filter.client")
+    def by_client(self, client):
+        return self._client_positions.get(client, np.empty(0, dtype=np.intp))
+
+    @timed("rekap.filter.tanggal")
+    def by_date(self, start, end):
+        """Baris dengan tanggal di [start, end] (inklusif, tanpa jam); baris tanpa tanggal tidak ikut."""
+        lo = np.searchsorted(self._sorted_dates, np.datetime64(pd.Timestamp(start).normalize(), "ns"), "left")
+        hi = np.searchsorted(self._sorted_dates, np.datetime64(pd.Timestamp(end).normalize(), "ns"), "right")
+        return np.sort(self._date_positions[lo:hi])
+
+    def _rank(self, column):
+        if column not in self._ranks:
+            values = self.frame[column]
+            try:
+                codes, _ = pd.factorize(values, sort=True)
+            except TypeError:  # Campuran tipe (mis. angka & teks hasil import Excel)
+                codes, _ = pd.factorize(values.map(lambda v: v if pd.isna(v) else str(v)), sort=True)
+            self._ranks[column] = codes  # Nilai kosong = -1
+        return self._ranks[column]
+
+    @timed("rekap.sort")
+    def sort(self, positions, column, ascending=True):
+        """Urutkan posisi menurut `column` (stabil); nilai kosong selalu di akhir."""
+        if positions is None:
+            positions = np.arange(self.size)
+        codes = self._rank(column)[positions]
+        big = np.iinfo(codes.dtype).max
+        keys = np.where(codes < 0, big, codes if ascending else big - 1 - codes)
+        return positions[np.argsort(keys, kind="stable")]
+
+    @timed("rekap.take")
+    def take(self, positions=None):
+        """Frame tampil untuk `positions` (None = semua baris)."""
+        return self.frame if positions is None else self.frame.iloc[positions]
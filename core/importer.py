@@ -0,0 +1,198 @@
+"""Import massal DO dari file Excel/CSV/JSON kiriman client atau ekspor ERP.
+
+Alurnya: baca file (`read_table`), petakan kolom file ke NEW_COLUMNS
+(`suggest_mapping`), lalu `validate` memeriksa seluruh baris sekaligus dengan
+operasi pandas (bukan loop per baris). Baris yang gagal dilaporkan per baris
+dan kolom; baris yang lolos disimpan sekaligus lewat `storage.insert_many`.
+"""
+import math
+import re
+
+import numpy as np
+import pandas as pd
+
+from core.schema import DATE_COLUMNS, NEW_COLUMNS
+
+REQUIRED_COLUMNS = ["Date", "Client", "Qty"]
+# Kolom yang tidak dipetakan dari file: No diisi storage, Month dihitung dari Date
+MAPPABLE_COLUMNS = [c for c in NEW_COLUMNS if c not in ("No", "Month")]
+# Nilai bawaan jika kolom tidak ada / kosong (sama dengan form input)
+DEFAULTS = {"Jenis BBM": "Biosolar Industri B40", "Transportir": "PT. SHA Solo"}
+ERROR_COLUMNS = ["Baris", "Kolom", "Pesan"]
+# Qty: sel angka Excel dan angka JSON dipakai apa adanya. Teks boleh angka polos
+# ("16000", "16000.5") atau format Indonesia seperti yang dicetak di PDF ("16.000",
+# "16.000,5", "8,5"). Koma ribuan ala Inggris ("8,500", "16,000.5") bisa terbaca
+# dua arti sehingga ditolak.
+QTY_PLAIN = r"[-+]?\d+(?:\.\d+)?"
+QTY_ID = r"[-+]?\d{1,3}(?:\.\d{3})+(?:,\d+)?|[-+]?\d+,\d+"
+QTY_AMBIGUOUS = r"[-+]?\d{1,3}(?:,\d{3})+(?:\.\d+)?"
+QTY_AMBIGUOUS_MESSAGE = "Format Qty ambigu, tulis 16.000 atau 16000 (koma = desimal)"
+
+
+def read_table(source, name):
+    """Baca file (.csv / .json / .xlsx) sebagai DataFrame nilai apa adanya.
+
+    CSV selalu teks. Sel Excel dan nilai JSON tetap bertipe aslinya (angka,
+    tanggal, teks) agar angka asli tidak dibaca ulang sebagai teks format
+    Indonesia. JSON berupa list objek, satu objek per DO (kunci = nama kolom).
+    """
+    if name.lower().endswith(".csv"):
+        return pd.read_csv(source, dtype=str, keep_default_na=False, sep=None, engine="python")
+    if name.lower().endswith(".json"):
+        raw = pd.read_json(source, orient="records", dtype=False, convert_dates=False)
+        return raw.astype(object).where(raw.notna(), "")
+    return pd.read_excel(source, dtype=object, keep_default_na=False, engine="openpyxl")
+
+
+def _normalize(name):
+    return re.sub(r"[^a-z0-9]", "", str(name).lower())
+
+
+def suggest_mapping(columns):
+    """Tebak pemetaan {kolom NEW_COLUMNS: kolom file} dari kemiripan nama kolom."""
+    by_name = {_normalize(c): c for c in columns}
+    return {col: by_name.get(_normalize(col)) for col in MAPPABLE_COLUMNS}
+
+
+def validate(raw, mapping, storage=None):
+    """Periksa semua baris sekaligus.
+
+    Mengembalikan (rows, errors): `rows` adalah DataFrame kolom NEW_COLUMNS berisi
+    baris valid (NOMOR DO kosong berarti minta nomor baru), `errors` DataFrame
+    (Baris, Kolom, Pesan) dengan nomor baris sesuai file (judul kolom = baris 1).
+    Dengan `storage`, NOMOR DO yang sudah tersimpan ikut dilaporkan sebagai
+    error (import tidak pernah menimpa DO lama).
+    """
+    df = pd.DataFrame(index=raw.index)
+    for col in MAPPABLE_COLUMNS:
+        source = mapping.get(col)
+        values = raw[source] if source else pd.Series("", index=raw.index)
+        if col == "Qty":
+            qty_values = values
+        df[col] = values.fillna("").astype(str).str.strip()
+    for col, default in DEFAULTS.items():
+        df[col] = df[col].mask(df[col] == "", default)
+
+    problems = []
+
+    def flag(mask, col, message):
+        if mask.any():
+            problems.append(pd.DataFrame({"pos": raw.index[mask], "Kolom": col, "Pesan": message}))
+
+    for col in REQUIRED_COLUMNS:
+        flag(df[col] == "", col, "Wajib diisi")
+
+    for col in DATE_COLUMNS:
+        # ISO (2025-10-25, juga hasil sel tanggal Excel) dulu, sisanya format Indonesia (25/10/2025)
+        parsed = pd.to_datetime(df[col], errors="coerce", format="ISO8601")
+        rest = parsed.isna() & (df[col] != "")
+        if rest.any():
+            parsed[rest] = pd.to_datetime(df.loc[rest, col], errors="coerce", dayfirst=True, format="mixed")
+        flag((df[col] != "") & parsed.isna(), col, "Format tanggal tidak dikenali")
+        df[col] = parsed
+
+    qty, ambiguous = parse_qty(qty_values)
+    flag(ambiguous, "Qty", QTY_AMBIGUOUS_MESSAGE)
+    flag((df["Qty"] != "") & qty.isna() & ~ambiguous, "Qty", "Qty harus berupa angka")
+    flag(qty.notna() & (qty <= 0), "Qty", "Qty harus lebih dari 0")
+    df["Qty"] = qty
+
+    given = df["NOMOR DO"] != ""
+    flag(given & df["NOMOR DO"].duplicated(keep=False), "NOMOR DO", "NOMOR DO ganda di dalam file")
+    if storage is not None and given.any():
+        taken = storage.existing_do_numbers(df.loc[given, "NOMOR DO"])
+        flag(given & df["NOMOR DO"].isin(taken), "NOMOR DO", "NOMOR DO sudah ada di database")
+
+    errors = pd.concat(problems, ignore_index=True) if problems else pd.DataFrame(columns=["pos", "Kolom", "Pesan"])
+    bad = raw.index.isin(errors["pos"])
+    errors["Baris"] = raw.index.get_indexer(errors["pos"]) + 2
+    errors = errors.sort_values(["Baris", "Kolom"])[ERROR_COLUMNS].reset_index(drop=True)
+
+    rows = df[~bad].copy()
+    rows["Month"] = rows["Date"].dt.strftime("%B")
+    rows["No"] = None
+    return rows.reindex(columns=NEW_COLUMNS).reset_index(drop=True), errors
+
+
+def _is_number(value):
+    return isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, (bool, np.bool_))
+
+
+def parse_qty(values):
+    """Series Qty -> (angka float, NaN jika tidak valid / tak hingga; mask format ambigu).
+
+    Nilai angka dipakai apa adanya; aturan format Indonesia hanya untuk teks.
+    """
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        qty = values.astype(float)
+        return qty.where(np.isfinite(qty)), pd.Series(False, index=values.index)
+    numeric = values.map(_is_number).astype(bool)
+    text = values.where(~numeric, "").fillna("").astype(str).str.strip().str.replace(" ", "", regex=False)
+    ambiguous = text.str.fullmatch(QTY_AMBIGUOUS)
+    id_format = ~ambiguous & text.str.fullmatch(QTY_ID)
+    plain = ~ambiguous & ~id_format & text.str.fullmatch(QTY_PLAIN)
+    text = text.mask(id_format, text.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    qty = pd.to_numeric(text.where(id_format | plain), errors="coerce").astype(float)
+    qty = qty.mask(numeric, pd.to_numeric(values.where(numeric), errors="coerce"))
+    return qty.where(np.isfinite(qty)), ambiguous
+
+
+def _parse_qty_value(value):
+    """Satu nilai Qty dengan aturan `parse_qty`: (angka atau None, format ambigu)."""
+    if _is_number(value):
+        value = float(value)
+        return (value if math.isfinite(value) else None), False
+    text = str(value).strip().replace(" ", "")
+    if re.fullmatch(QTY_AMBIGUOUS, text):
+        return None, True
+    if re.fullmatch(QTY_ID, text):
+        text = text.replace(".", "").replace(",", ".")
+    elif not re.fullmatch(QTY_PLAIN, text):
+        return None, False
+    value = float(text)
+    return (value if math.isfinite(value) else None), False
+
+
+def _parse_date(text):
+    """Satu nilai tanggal dengan aturan yang sama seperti `validate` (ISO dulu, lalu dd/mm/yyyy)."""
+    value = pd.to_datetime(text, errors="coerce", format="ISO8601")
+    if pd.isna(value):
+        value = pd.to_datetime(text, errors="coerce", dayfirst=True, format="mixed")
+    return value
+
+
+def validate_record(record):
+    """Validasi satu DO (dict, kunci = nama kolom NEW_COLUMNS) dengan aturan yang sama.
+
+    Mengembalikan (row, errors): `row` dict siap simpan atau None jika ada error,
+    `errors` list {"Kolom", "Pesan"}. Kunci yang bukan kolom DO diabaikan.
+    Aturan per nilai tanpa DataFrame, karena API memanggilnya per request.
+    """
+    row = {}
+    for col in MAPPABLE_COLUMNS:
+        value = record.get(col)
+        row[col] = "" if value is None else str(value).strip()
+    qty_value = record.get("Qty")  # Angka JSON tetap angka, bukan teks format Indonesia
+    for col, default in DEFAULTS.items():
+        row[col] = row[col] or default
+
+    errors = [{"Kolom": col, "Pesan": "Wajib diisi"} for col in REQUIRED_COLUMNS if row[col] == ""]
+    for col in DATE_COLUMNS:
+        parsed = _parse_date(row[col]) if row[col] else pd.NaT
+        if row[col] and pd.isna(parsed):
+            errors.append({"Kolom": col, "Pesan": "Format tanggal tidak dikenali"})
+        row[col] = parsed
+    qty, ambiguous = _parse_qty_value(qty_value) if row["Qty"] else (None, False)
+    if ambiguous:
+        errors.append({"Kolom": "Qty", "Pesan": QTY_AMBIGUOUS_MESSAGE})
+    elif row["Qty"] and qty is None:
+        errors.append({"Kolom": "Qty", "Pesan": "Qty harus berupa angka"})
+    elif qty is not None and qty <= 0:
+        errors.append({"Kolom": "Qty", "Pesan": "Qty harus lebih dari 0"})
+    row["Qty"] = float("nan") if qty is None else qty
+    if errors:
+        return None, sorted(errors, key=lambda e: e["Kolom"])
+
+    row["Month"] = row["Date"].strftime("%B")
+    row["No"] = None
+    return {col: row[col] for col in NEW_COLUMNS}, []
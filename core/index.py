@@ -0,0 +1,125 @@
+"""Frame DO yang di-cache beserta index hash NOMOR DO -> posisi baris.
+
+Panggil data, cek keberadaan, simpan dan hapus cukup lookup dict (exact key),
+bukan scan `str.contains` / boolean mask ke seluruh DataFrame. Baris baru dan
+baris yang dihapus dicatat dulu, lalu digabung sekali saat `frame` dibaca.
+Index filter rekap (core/filters.py) dibangun dari frame yang sama, sekali
+per versi data. Index saran isian (core/suggest.py) dibangun sekali lalu
+ikut diperbarui per baris di `upsert` / `delete`.
+"""
+import bisect
+import threading
+
+import pandas as pd
+
+from core.filters import FilterIndex
+from core.schema import DATE_COLUMNS, NEW_COLUMNS
+from core.suggest import SuggestIndex
+
+
+class DOIndex:
+    def __init__(self, df):
+        self._lock = threading.RLock()
+        self._suggest = None
+        self._set_frame(df)
+
+    def _set_frame(self, df):
+        self._df = df.reset_index(drop=True)
+        self._pending = []   # Baris baru yang belum digabung ke _df
+        self._dead = set()   # Posisi baris yang sudah dihapus/diganti
+        self._pos = {
+            str(nomor): i for i, nomor in enumerate(self._df["NOMOR DO"]) if pd.notna(nomor)
+        }
+        self._keys = sorted(self._pos)  # Urut naik, dijaga dengan bisect
+        self._options = None
+        self._filters = None
+
+    # --- Lookup ---
+    def __contains__(self, do_number):
+        return do_number in self._pos
+
+    def __len__(self):
+        return len(self._pos)
+
+    def get_row(self, do_number):
+        """Ambil satu baris DO (Series) berdasarkan NOMOR DO, atau None."""
+        with self._lock:
+            pos = self._pos.get(do_number)
+            if pos is None:
+                return None
+            if pos < len(self._df):
+                return self._df.iloc[pos]
+            return self._pending[pos - len(self._df)]
+
+    def options(self):
+        """Daftar NOMOR DO terurut menurun untuk selectbox (di-cache sampai ada perubahan)."""
+        with self._lock:
+            if self._options is None:
+                self._options = self._keys[::-1]
+            return self._options
+
+    @property
+    def frame(self):
+        """DataFrame lengkap (urut kolom No); perubahan yang tertunda digabung sekali di sini."""
+        with self._lock:
+            if self._pending or self._dead:
+                n = len(self._df)
+                df = self._df.drop(index=[p for p in self._dead if p < n])
+                pending = [row for i, row in enumerate(self._pending) if n + i not in self._dead]
+                if pending:
+                    df = pd.concat([df, pd.DataFrame(pending, columns=NEW_COLUMNS)], ignore_index=True)
+                    # Baris hasil import bisa membawa No lama; jaga urutan sesuai storage
+                    df = df.sort_values("No", kind="stable")
+                self._set_frame(df)
+            return self._df
+
+    @property
+    def filters(self):
+        """FilterIndex untuk `frame` saat ini (dibangun ulang hanya jika data berubah)."""
+        with self._lock:
+            df = self.frame
+            if self._filters is None:
+                self._filters = FilterIndex(df)
+            return self._filters
+
+    @property
+    def suggestions(self):
+        """SuggestIndex untuk autocomplete form (dibangun sekali, lalu diperbarui inkremental)."""
+        with self._lock:
+            if self._suggest is None:
+                self._suggest = SuggestIndex(self.frame)
+            return self._suggest
+
+    # --- Update (dipanggil setelah storage berhasil menulis) ---
+    def upsert(self, record):
+        """Masukkan/ganti satu DO. `record` adalah dict hasil `storage.get_do`."""
+        row = dict(record)
+        for col in DATE_COLUMNS:
+            row[col] = pd.to_datetime(row.get(col), errors="coerce")
+        do_number = str(row["NOMOR DO"])
+        with self._lock:
+            if do_number in self._pos:
+                if self._suggest is not None:
+                    self._suggest.remove(self.get_row(do_number))
+                # DO yang diedit pindah ke posisi terakhir (mengikuti kolom No)
+                self._dead.add(self._pos[do_number])
+            else:
+                bisect.insort(self._keys, do_number)
+                self._options = None
+            self._pos[do_number] = len(self._df) + len(self._pending)
+            self._pending.append(pd.Series(row, index=NEW_COLUMNS))
+            if self._suggest is not None:
+                self._suggest.add(row)
+
+    def delete(self, do_number):
+        """Hapus satu DO dari index. Mengembalikan True jika DO ada."""
+        with self._lock:
+            if do_number not in self._pos:
+                return False
+            if self._suggest is not None:
+                self._suggest.remove(self.get_row(do_number))
+            pos = self._pos.pop(do_number)
+            self._dead.add(pos)
+            del self._keys[bisect.bisect_left(self._keys, do_number)]
+            self._options = None
+            return True
@@ -0,0 +1,189 @@
+"""Antrian job latar belakang untuk simpan DO + render PDF.
+
+Form input cukup memasukkan baris yang sudah divalidasi ke tabel `jobs`
+(di file SQLite yang sama dengan data DO) lalu langsung kembali. Worker
+thread mengerjakan penulisan storage dan render PDF, dan halaman cukup
+mem-polling status job.
+
+- Urutan per NOMOR DO dijaga: job baru untuk DO yang sama baru diambil
+  setelah job sebelumnya selesai/gagal.
+- Job yang sedang berjalan memegang "lease"; jika proses mati, lease habis
+  dan job diambil ulang. Job "simpan" berubah menjadi "render" di transaksi
+  yang sama dengan upsert DO, sehingga percobaan ulang setelah DO tersimpan
+  hanya merender ulang PDF (tidak menulis ulang DO dan memberi 'No' baru).
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+from core.pdf import archive_pdf_async, pdf_filename, render_pdf_bytes
+from core.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+JOBS_TABLE = "jobs"
+MAX_ATTEMPTS = 3
+LEASE_SECONDS = 300       # Job 'running' lebih lama dari ini dianggap yatim (proses mati)
+KEEP_DONE_SECONDS = 7 * 24 * 3600
+
+
+class JobQueue:
+    def __init__(self, storage, archive_folder=None):
+        self.storage = storage
+        self.archive_folder = archive_folder
+        self._wakeup = threading.Event()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self.handlers = {
+            "simpan": self._handle_simpan,
+            "render": self._handle_render,
+        }
+        with storage.transaction() as conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {JOBS_TABLE} ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, nomor_do TEXT NOT NULL, "
+                "payload TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'pending', "
+                "attempts INTEGER NOT NULL DEFAULT 0, error TEXT, pdf BLOB, "
+                "created_at REAL NOT NULL, not_before REAL NOT NULL DEFAULT 0, "
+                "locked_at REAL, finished_at REAL)"
+            )
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{JOBS_TABLE}_status ON {JOBS_TABLE} (status, id)")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{JOBS_TABLE}_do ON {JOBS_TABLE} (nomor_do, id)")
+            # Bersihkan job selesai yang sudah lama (beserta blob PDF-nya)
+            conn.execute(
+                f"DELETE FROM {JOBS_TABLE} WHERE status IN ('done', 'failed') AND finished_at < ?",
+                (time.time() - KEEP_DONE_SECONDS,),
+            )
+
+    # --- API untuk halaman ---
+    def submit(self, row, kind="simpan"):
+        """Masukkan satu DO ke antrian dan kembalikan id job (tanpa menunggu)."""
+        payload = json.dumps(row, default=str)
+        with self.storage.transaction() as conn:
+            cur = conn.execute(
+                f"INSERT INTO {JOBS_TABLE} (kind, nomor_do, payload, created_at) VALUES (?, ?, ?, ?)",
+                (kind, str(row["NOMOR DO"]), payload, time.time()),
+            )
+            job_id = cur.lastrowid
+        self.start()
+        self._wakeup.set()
+        return job_id
+
+    def submit_many(self, rows, kind="render"):
+        """Masukkan banyak DO ke antrian dalam satu transaksi. Mengembalikan list id job."""
+        now = time.time()
+        with self.storage.transaction() as conn:
+            job_ids = [
+                conn.execute(
+                    f"INSERT INTO {JOBS_TABLE} (kind, nomor_do, payload, created_at) VALUES (?, ?, ?, ?)",
+                    (kind, str(row["NOMOR DO"]), json.dumps(row, default=str), now),
+                ).lastrowid
+                for row in rows
+            ]
+        self.start()
+        self._wakeup.set()
+        return job_ids
+
+    def status(self, job_id, with_pdf=False):
+        """Status satu job sebagai dict (status, attempts, error, dan pdf jika diminta)."""
+        columns = "id, kind, nomor_do, status, attempts, error" + (", pdf" if with_pdf else "")
+        with self.storage.connect() as conn:
+            row = conn.execute(f"SELECT {columns} FROM {JOBS_TABLE} WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        keys = ["id", "kind", "nomor_do", "status", "attempts", "error"] + (["pdf"] if with_pdf else [])
+        return dict(zip(keys, row))
+
+    # --- Worker ---
+    def start(self):
+        """Jalankan worker thread (sekali per proses)."""
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="job-worker", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            try:
+                if not self.run_next():
+                    self._wakeup.wait(timeout=1.0)
+                    self._wakeup.clear()
+            except Exception:  # Worker tidak boleh mati karena satu error tak terduga
+                logger.exception("Job worker error")
+                time.sleep(1.0)
+
+    def _claim(self):
+        now = time.time()
+        with self.storage.transaction() as conn:
+            # Job tertua yang siap jalan, dan tidak ada job lebih awal untuk DO yang sama
+            row = conn.execute(
+                f"SELECT id, kind, payload, attempts FROM {JOBS_TABLE} j "
+                "WHERE ((status = 'pending' AND not_before <= ?) OR (status = 'running' AND locked_at < ?)) "
+                f"AND NOT EXISTS (SELECT 1 FROM {JOBS_TABLE} k WHERE k.nomor_do = j.nomor_do AND k.id < j.id "
+                "AND k.status IN ('pending', 'running')) "
+                "ORDER BY id LIMIT 1",
+                (now, now - LEASE_SECONDS),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                f"UPDATE {JOBS_TABLE} SET status = 'running', locked_at = ? WHERE id = ?", (now, row[0])
+            )
+        return row
+
+    def run_next(self):
+        """Kerjakan satu job. Mengembalikan False jika antrian kosong."""
+        claimed = self._claim()
+        if claimed is None:
+            return False
+        job_id, kind, payload, attempts = claimed
+        try:
+            pdf_bytes = self.handlers[kind](job_id, json.loads(payload))
+        except Exception as e:
+            attempts += 1
+            status = "failed" if attempts >= MAX_ATTEMPTS else "pending"
+            with self.storage.transaction() as conn:
+                conn.execute(
+                    f"UPDATE {JOBS_TABLE} SET status = ?, attempts = ?, error = ?, not_before = ?, "
+                    "locked_at = NULL, finished_at = ? WHERE id = ?",
+                    (status, attempts, f"{type(e).__name__}: {e}", time.time() + 2 ** attempts,
+                     time.time() if status == "failed" else None, job_id),
+                )
+            return True
+        with self.storage.transaction() as conn:
+            conn.execute(
+                f"UPDATE {JOBS_TABLE} SET status = 'done', error = NULL, pdf = ?, locked_at = NULL, "
+                "finished_at = ? WHERE id = ?",
+                (pdf_bytes, time.time(), job_id),
+            )
+        return True
+
+    # --- Handler ---
+    def _handle_simpan(self, job_id, row):
+        with self.storage.transaction() as conn:
+            self.storage.upsert_do(row, conn=conn)
+            conn.execute(f"UPDATE {JOBS_TABLE} SET kind = 'render' WHERE id = ?", (job_id,))
+        return self._handle_render(job_id, row)
+
+    def _handle_render(self, job_id, row):
+        pdf_bytes = render_pdf_bytes(row)
+        if self.archive_folder:
+            archive_pdf_async(pdf_bytes, os.path.join(self.archive_folder, pdf_filename(row["NOMOR DO"])))
+        return pdf_bytes
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_job_queue(storage=None, archive_folder="pdf_output"):
+    """Antrian job bersama per database (satu worker per proses)."""
+    storage = storage or get_storage()
+    with _queues_lock:
+        if storage.path not in _queues:
+            _queues[storage.path] = JobQueue(storage, archive_folder)
+            # Worker langsung jalan agar job yang tertinggal saat restart ikut dikerjakan
+            _queues[storage.path].start()
+        return _queues[storage.path]
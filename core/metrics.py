@@ -0,0 +1,211 @@
+"""Instrumentasi ringan: waktu eksekusi operasi penting di dalam proses.
+
+Pakai `timed("nama.operasi")` sebagai context manager atau decorator. Setiap
+pengukuran masuk ke histogram latensi per operasi (jumlah, total, min/max,
+jumlah error) dan dicatat ke log lokal yang berotasi. Log ditulis per proses
+(`logs/metrics.<pid>.log`) karena app, worker PDF, API dan CLI berjalan di
+proses berbeda dan rotasi file tidak aman dibagi antar proses; baris log hanya
+diantrikan di jalur panas dan ditulis ke file oleh thread terpisah.
+Isi histogram bisa dilihat di halaman Metrik atau diekspor dalam format teks
+Prometheus (`to_prometheus`).
+
+Data hanya disimpan di memori proses ini (reset saat server restart); proses
+worker cetak massal punya histogram sendiri.
+"""
+import atexit
+import functools
+import glob
+import logging
+import multiprocessing.util
+import os
+import queue
+import threading
+import time
+from bisect import bisect_left
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_DIR = "logs"
+LOG_PATH = os.path.join(LOG_DIR, "metrics.{pid}.log")  # Satu file (berotasi) per proses
+LOG_MAX_BYTES = 1_000_000
+LOG_BACKUPS = 5
+LOG_RETENTION_DAYS = 7  # Log proses lama (sudah berhenti) dihapus setelah sekian hari
+# Batas atas bucket histogram dalam milidetik (bucket terakhir = tak hingga)
+BUCKETS_MS = [1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+PROMETHEUS_PREFIX = "surat_jalan"
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = None
+        self.max_ms = None
+        self.errors = 0
+
+    def observe(self, ms, error=False):
+        self.counts[bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.min_ms = ms if self.min_ms is None else min(self.min_ms, ms)
+        self.max_ms = ms if self.max_ms is None else max(self.max_ms, ms)
+        self.errors += bool(error)
+
+    def quantile(self, q):
+        """Perkiraan persentil dari bucket (interpolasi linear di dalam bucket)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = BUCKETS_MS[i - 1] if i else 0.0
+                upper = BUCKETS_MS[i] if i < len(BUCKETS_MS) else self.max_ms
+                value = lower + (upper - lower) * (rank - seen) / n
+                return min(max(value, self.min_ms), self.max_ms)
+            seen += n
+        return self.max_ms
+
+
+_histograms = {}
+_lock = threading.Lock()
+_logger = None
+_logger_pid = None
+
+
+def _prune_logs():
+    cutoff = time.time() - LOG_RETENTION_DAYS * 86400
+    for path in glob.glob(os.path.join(LOG_DIR, "metrics.*.log*")):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def _flush_at_exit(listener):
+    """Tulis sisa antrian saat proses selesai (juga worker multiprocessing yang tidak memanggil atexit)."""
+    stopped = threading.Lock()
+
+    def stop():
+        if stopped.acquire(blocking=False):
+            listener.stop()
+
+    atexit.register(stop)
+    multiprocessing.util.Finalize(None, stop, exitpriority=10)
+
+
+def _get_logger():
+    global _logger, _logger_pid
+    pid = os.getpid()
+    if _logger_pid != pid:  # Proses baru (juga hasil fork): thread penulis milik induk tidak ikut
+        logger = logging.getLogger(f"surat_jalan.metrics.{pid}")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        try:
+            os.makedirs(LOG_DIR, exist_ok=True)
+            _prune_logs()
+            handler = RotatingFileHandler(
+                LOG_PATH.format(pid=pid), maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            log_queue = queue.SimpleQueue()
+            listener = QueueListener(log_queue, handler)
+            listener.start()
+            _flush_at_exit(listener)
+            logger.addHandler(QueueHandler(log_queue))
+        except OSError:  # Folder tidak bisa ditulis: histogram tetap jalan tanpa log
+            logger.addHandler(logging.NullHandler())
+        _logger, _logger_pid = logger, pid
+    return _logger
+
+
+def record(name, ms, error=False):
+    """Catat satu pengukuran (milidetik) untuk operasi `name`."""
+    with _lock:
+        if name not in _histograms:
+            _histograms[name] = Histogram()
+        _histograms[name].observe(ms, error)
+        logger = _get_logger()
+    logger.info("%s %.3f ms%s", name, ms, " ERROR" if error else "")
+
+
+class timed:
+    """Ukur durasi blok kode (`with timed("x"):`) atau fungsi (`@timed("x")`)."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record(self.name, (time.perf_counter() - self._start) * 1000, error=exc_type is not None)
+        return False
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(self.name):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+def snapshot():
+    """Ringkasan semua operasi sebagai list dict (urut nama)."""
+    with _lock:
+        return [
+            {
+                "Operasi": name,
+                "Jumlah": h.count,
+                "Error": h.errors,
+                "Rata-rata (ms)": h.total_ms / h.count,
+                "p50 (ms)": h.quantile(0.5),
+                "p95 (ms)": h.quantile(0.95),
+                "Maks (ms)": h.max_ms,
+                "Total (ms)": h.total_ms,
+            }
+            for name, h in sorted(_histograms.items())
+        ]
+
+
+def buckets(name):
+    """[(label_bucket, jumlah)] untuk satu operasi."""
+    with _lock:
+        h = _histograms.get(name)
+        counts = list(h.counts) if h else [0] * (len(BUCKETS_MS) + 1)
+    labels = [f"≤ {b:g} ms" for b in BUCKETS_MS] + [f"> {BUCKETS_MS[-1]:g} ms"]
+    return list(zip(labels, counts))
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+
+def to_prometheus():
+    """Semua histogram dalam format teks eksposisi Prometheus (detik)."""
+    metric = f"{PROMETHEUS_PREFIX}_operation_duration_seconds"
+    lines = [
+        f"# HELP {metric} Durasi operasi aplikasi Surat Jalan.",
+        f"# TYPE {metric} histogram",
+    ]
+    errors = []
+    with _lock:
+        for name, h in sorted(_histograms.items()):
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            cumulative = 0
+            for bound, n in zip(BUCKETS_MS + [None], h.counts):
+                cumulative += n
+                le = "+Inf" if bound is None else f"{bound / 1000:g}"
+                lines.append(f'{metric}_bucket{{operation="{label}",le="{le}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{operation="{label}"}} {h.total_ms / 1000:.6f}')
+            lines.append(f'{metric}_count{{operation="{label}"}} {h.count}')
+            errors.append(f'{PROMETHEUS_PREFIX}_operation_errors_total{{operation="{label}"}} {h.errors}')
+    if errors:
+        lines += [
+            f"# HELP {PROMETHEUS_PREFIX}_operation_errors_total Jumlah operasi yang gagal.",
+            f"# TYPE {PROMETHEUS_PREFIX}_operation_errors_total counter",
+        ] + errors
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,206 @@
+"""Pembuat PDF Surat Jalan (Fuel Order Delivery).
+
+Dipisah dari halaman Streamlit agar bisa dipanggil dari proses worker
+(cetak massal) maupun dari halaman input.
+
+Modul ini ringan untuk di-import: ReportLab (layout di core/pdf_template.py)
+baru dimuat saat PDF pertama dirender, dan Pillow saat gambar header diolah.
+Halaman yang hanya butuh path header atau nama file PDF (Rekap, Pengaturan)
+tidak ikut menanggung biaya import tersebut.
+
+Template di-cache per gambar header dan identitas perusahaan
+(core/config.py), sehingga perubahan di halaman Pengaturan langsung dipakai
+tanpa restart.
+
+Gambar header diperkecil tepat ke resolusi cetak (20.8 x 3.5 cm @ 300 dpi)
+dan dikompres JPEG sekali saja: saat upload di halaman Pengaturan, atau saat
+pertama dipakai untuk file header yang ditaruh manual di folder assets.
+"""
+import glob
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from core.config import load_config
+from core.metrics import timed
+
+# --- 1. Konfigurasi Path ---
+ASSETS_FOLDER = "assets"
+PDF_FOLDER = "pdf_output"  # Arsip PDF hasil input / import (dibuat saat PDF pertama disimpan)
+# Path untuk Header Image (hasil upload halaman Pengaturan didahulukan)
+HEADER_UPLOAD_PATH = os.path.join(ASSETS_FOLDER, "header_sha.jpg")
+HEADER_IMAGE_PATHS = [
+    HEADER_UPLOAD_PATH,
+    os.path.join(ASSETS_FOLDER, "header_sha.png"),
+    os.path.join(ASSETS_FOLDER, "sha.jpg"),
+]
+HEADER_CACHE_FOLDER = os.path.join(ASSETS_FOLDER, ".cetak")  # Header hasil olah dari file manual
+HEADER_DPI = 300
+HEADER_QUALITY = 85
+HEADER_MARKER = b"surat-jalan-header"  # Komentar JPEG penanda header yang sudah diolah
+
+LEBAR_KOP_CM = 20.8
+TINGGI_KOP_CM = 3.5
+# Ukuran piksel header pada resolusi cetak (1 inch = 2.54 cm)
+HEADER_PIXELS = (round(LEBAR_KOP_CM / 2.54 * HEADER_DPI), round(TINGGI_KOP_CM / 2.54 * HEADER_DPI))
+
+
+def pdf_filename(do_number):
+    """Nama file PDF yang aman untuk satu nomor DO."""
+    safe_filename = "".join(c for c in str(do_number) if c.isalnum() or c in ('-', '_')).rstrip()
+    return f"{safe_filename}.pdf"
+
+
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+# --- Gambar Header (diolah sekali ke resolusi cetak) ---
+def process_header_image(source, target):
+    """Ubah gambar header (path/objek file) ke ukuran cetak KOP, simpan sebagai JPEG."""
+    from PIL import Image
+
+    with Image.open(source) as img:
+        img = img.convert("RGBA") if img.mode in ("RGBA", "LA", "P") else img.convert("RGB")
+        if img.mode == "RGBA":
+            # Kertas putih: transparansi diratakan agar bisa JPEG (tanpa soft-mask)
+            background = Image.new("RGB", img.size, "white")
+            background.paste(img, mask=img.getchannel("A"))
+            img = background
+        # Gambar dicetak memenuhi kotak KOP: samakan ukuran piksel (tanpa memperbesar)
+        size = (min(img.width, HEADER_PIXELS[0]), min(img.height, HEADER_PIXELS[1]))
+        if size != img.size:
+            img = img.resize(size, Image.LANCZOS)
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+        # Nama sementara unik: worker cetak massal bisa mengolah header yang sama bersamaan
+        tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        img.save(tmp, "JPEG", quality=HEADER_QUALITY, optimize=True, dpi=(HEADER_DPI, HEADER_DPI),
+                 comment=HEADER_MARKER)
+    os.replace(tmp, target)
+    return target
+
+
+def save_header_upload(uploaded_file):
+    """Olah gambar header yang di-upload lalu simpan sebagai header aktif. Mengembalikan path."""
+    process_header_image(uploaded_file, HEADER_UPLOAD_PATH)
+    _reset_header_cache()
+    return HEADER_UPLOAD_PATH
+
+
+_header_lock = threading.Lock()
+_header_resolved = None   # (path_sumber, mtime) terakhir yang ditemukan
+_header_prepared = {}     # (path_sumber, mtime, ukuran) -> path siap cetak
+
+
+def _reset_header_cache():
+    global _header_resolved
+    with _header_lock:
+        _header_resolved = None
+
+
+def find_header_path():
+    """Path header aktif + mtime; cukup satu stat selama file yang sama masih ada."""
+    global _header_resolved
+    with _header_lock:
+        if _header_resolved is not None:
+            path, mtime = _header_resolved
+            try:
+                if os.path.getmtime(path) == mtime:
+                    return _header_resolved
+            except OSError:
+                pass
+        _header_resolved = None
+        for path in HEADER_IMAGE_PATHS:
+            if os.path.exists(path):
+                _header_resolved = (path, os.path.getmtime(path))
+                break
+        return _header_resolved
+
+
+def prepare_header_image(path):
+    """Path gambar header siap cetak; file yang belum diolah diproses sekali lalu di-cache."""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    with _header_lock:
+        if key in _header_prepared:
+            return _header_prepared[key]
+    from PIL import Image
+
+    with Image.open(path) as img:
+        ready = img.format == "JPEG" and img.info.get("comment") == HEADER_MARKER
+    if ready:
+        result = path
+    else:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        result = os.path.join(HEADER_CACHE_FOLDER, f"{stem}_{hashlib.sha1(repr(key).encode()).hexdigest()[:12]}.jpg")
+        if not os.path.exists(result):
+            for old in glob.glob(os.path.join(HEADER_CACHE_FOLDER, f"{stem}_*.jpg")):
+                os.remove(old)
+            process_header_image(path, result)
+    with _header_lock:
+        _header_prepared[key] = result
+    return result
+
+
+def get_template(identity=None):
+    """Template yang di-cache per gambar header (path + mtime) dan identitas perusahaan."""
+    identity = identity or load_config()
+    found = find_header_path()
+    header_path = prepare_header_image(found[0]) if found else None
+    key = (header_path, found[1] if found else None, tuple(sorted(identity.items())))
+    with _templates_lock:
+        if key not in _templates:
+            _templates.clear()
+            from core.pdf_template import SuratJalanTemplate  # ReportLab dimuat di sini
+
+            _templates[key] = SuratJalanTemplate(header_path, identity)
+        return _templates[key]
+
+
+@timed("pdf.build")
+def build_pdf_sha(data_row, output_path, identity=None):
+    """Render satu Surat Jalan. `output_path` boleh path file atau objek file (BytesIO).
+
+    `identity` adalah data identitas perusahaan; default dari `load_config()`.
+    """
+    get_template(identity).render(data_row, output_path)
+
+
+def render_pdf_bytes(data_row, identity=None):
+    """Render satu Surat Jalan langsung ke memori dan kembalikan bytes PDF."""
+    buffer = io.BytesIO()
+    build_pdf_sha(data_row, buffer, identity)
+    return buffer.getvalue()
+
+
+@timed("pdf.print_run")
+def render_print_run(rows, identity=None):
+    """Gabungkan banyak DO ke satu PDF multi-halaman (satu job cetak).
+
+    Header, font dan elemen statis hanya tertanam sekali. Mengembalikan
+    (pdf_bytes atau None jika semua gagal, daftar_error (nomor_do, pesan)).
+    """
+    buffer = io.BytesIO()
+    count, errors = get_template(identity).render_many(rows, buffer)
+    return (buffer.getvalue() if count else None), errors
+
+
+# --- 2. Arsip PDF ke Disk (Asinkron) ---
+_archive_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="arsip-pdf")
+
+
+def write_pdf_file(pdf_bytes, path):
+    """Tulis bytes PDF ke `path` secara atomik (folder dibuat jika belum ada)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(pdf_bytes)
+    os.replace(tmp_path, path)  # Tidak pernah meninggalkan PDF setengah jadi
+    return path
+
+
+def archive_pdf_async(pdf_bytes, path):
+    """Simpan salinan PDF ke disk di thread latar belakang. Mengembalikan Future."""
+    return _archive_executor.submit(write_pdf_file, pdf_bytes, path)
@@ -0,0 +1,373 @@
+"""Layout Surat Jalan dengan ReportLab (dimuat hanya saat PDF benar-benar dibuat).
+
+Bagian halaman yang tidak pernah berubah (style, gambar header, judul,
+Berita Acara, peringatan dan blok tanda tangan) disusun sekali oleh
+`SuratJalanTemplate` lalu dipakai ulang; per DO hanya sel variabel (DO #,
+Attn, Ship To, Site, PO, tanggal, Qty, transportir/fleet/driver) yang dibuat.
+
+`render_many` menyusun banyak DO sebagai halaman-halaman satu dokumen (print
+run): gambar header, font dan style hanya tertanam sekali di file PDF.
+
+Modul ini sengaja tidak di-import di level atas halaman mana pun: import
+ReportLab mahal, sehingga `core.pdf` baru memuatnya di `get_template`.
+"""
+import threading
+from contextlib import contextmanager
+from xml.sax.saxutils import escape
+
+import pandas as pd
+from reportlab import rl_config
+from reportlab.lib.pagesizes import A4
+from reportlab.lib import colors
+from reportlab.platypus import (
+    SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, PageBreak
+)
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import cm, mm
+
+from core.config import load_config
+from core.pdf import LEBAR_KOP_CM, TINGGI_KOP_CM
+
+LEBAR_PENUH_KOP = LEBAR_KOP_CM*cm
+TINGGI_KOP = TINGGI_KOP_CM*cm
+LEBAR_KONTEN_TENGAH = 19.0*cm
+SPACER_WIDTH = (LEBAR_PENUH_KOP - LEBAR_KONTEN_TENGAH) / 2
+
+_rl_config_lock = threading.Lock()
+
+
+def _format_date(value):
+    # Terima date/datetime/Timestamp (dari form maupun database) atau string
+    if hasattr(value, "strftime") and not pd.isna(value):
+        return value.strftime("%Y-%m-%d")
+    return str(value if value is not None else "")
+
+
+@contextmanager
+def _binary_streams():
+    """Matikan ASCII85 (yang menambah ~25% ukuran) selama satu build Surat Jalan.
+
+    `rl_config.useA85` adalah setting global ReportLab yang dibaca saat gambar
+    dan stream ditulis; tidak ada opsi per dokumen, sehingga nilainya hanya
+    diubah selama build lalu dikembalikan, bukan saat modul di-import.
+    """
+    with _rl_config_lock:
+        previous = rl_config.useA85
+        rl_config.useA85 = 0
+        try:
+            yield
+        finally:
+            rl_config.useA85 = previous
+
+
+def _centered(flowable):
+    """Bungkus konten 19 cm di tengah lebar KOP 20.8 cm."""
+    return Table([[
+        Spacer(1,1),
+        flowable,
+        Spacer(1,1)
+    ]], colWidths=[SPACER_WIDTH, LEBAR_KONTEN_TENGAH, SPACER_WIDTH])
+
+
+# --- Template Surat Jalan (ReportLab - KOREKSI TOTAL LAYOUT) ---
+class SuratJalanTemplate:
+    """Layout Surat Jalan yang bagian statisnya disusun sekali."""
+
+    def __init__(self, header_path, identity=None):
+        self.header_path = header_path
+        self.identity = dict(identity or load_config())
+        # ReportLab tidak thread-safe untuk flowable yang dipakai bersama
+        self._lock = threading.Lock()
+
+        styles = getSampleStyleSheet()
+        styles.add(ParagraphStyle(name='NormalSmall', parent=styles['Normal'], fontSize=9, leading=11))
+        styles.add(ParagraphStyle(name='BoldSmall', parent=styles['Normal'], fontSize=9, leading=11, fontName='Helvetica-Bold'))
+        styles.add(ParagraphStyle(name='HeaderTitle', parent=styles['Normal'], fontSize=16, alignment=1, spaceAfter=2, fontName='Helvetica-Bold'))
+        styles.add(ParagraphStyle(name='FooterCenter', parent=styles['Normal'], fontSize=9, leading=11, alignment=1))
+        styles.add(ParagraphStyle(name='CenterAlignSmall', parent=styles['Normal'], fontSize=9, leading=11, alignment=1))
+        styles.add(ParagraphStyle(name='BeritaAcaraTitle', parent=styles['Normal'], fontSize=10, leading=12, alignment=1, fontName='Helvetica-Bold'))
+        self.styles = styles
+
+        self._build_static()
+
+    def _build_static(self):
+        styles = self.styles
+        nama = self.identity.get("Nama Perusahaan", "")
+
+        # --- Header Gambar ---
+        if self.header_path:
+            self.header = [
+                # JPEG siap cetak (core.pdf.prepare_header_image) ditanam apa adanya, tanpa encode ulang
+                Image(self.header_path, width=LEBAR_PENUH_KOP, height=TINGGI_KOP),
+                Spacer(1, 2*mm),
+            ]
+        else:
+            kontak = " | ".join(
+                escape(str(self.identity[k])) for k in ["Alamat 1", "Telepon", "Email", "Website"] if self.identity.get(k)
+            )
+            self.header = [
+                Paragraph(f"<b>{escape(nama)} - [MOHON MASUKKAN GAMBAR HEADER 'sha.jpg' di folder 'assets']</b>", styles['Normal']),
+                Paragraph(kontak, styles['NormalSmall']),
+                Spacer(1, 8*mm),
+            ]
+        self.to_value = f": {nama}"
+
+        # --- Judul ---
+        self.title = [
+            _centered(Paragraph("<u>FUEL ORDER DELIVERY</u>", styles['HeaderTitle'])),
+            Spacer(1, 5*mm),
+        ]
+
+        self.info_kiri_style = TableStyle([
+            ('VALIGN', (0,0), (-1,-1), 'TOP'), ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
+            ('FONTSIZE', (0,0), (-1,-1), 9),
+            ('LEFTPADDING', (0,0), (-1,-1), 0), ('RIGHTPADDING', (0,0), (-1,-1), 0),
+            ('BOTTOMPADDING', (0,0), (-1,-1), 1*mm),
+        ])
+        self.info_kanan_style = TableStyle([
+            ('VALIGN', (0,0), (-1,-1), 'TOP'), ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
+            ('FONTSIZE', (0,0), (-1,-1), 9),
+            ('ALIGN', (0,0), (0,-1), 'RIGHT'),
+            ('ALIGN', (1,0), (1,-1), 'CENTER'),
+            ('ALIGN', (2,0), (2,-1), 'LEFT'),
+            ('LEFTPADDING', (0,0), (-1,-1), 0), ('RIGHTPADDING', (0,0), (-1,-1), 0),
+            ('BOTTOMPADDING', (0,0), (-1,-1), 1*mm),
+        ])
+        self.info_kanan_labels = [
+            Paragraph(label, styles['NormalSmall'])
+            for label in ["Date", "Ship To", "Site", "NO PO", "Tgl PO", "CP"]
+        ]
+        self.gabungan_style = TableStyle([('VALIGN', (0,0), (-1,-1), 'TOP')])
+        self.items_style = TableStyle([
+            ('GRID', (0,0), (-1,-1), 0.5, colors.black), ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
+            ('VALIGN', (0,0), (-1,-1), 'MIDDLE'), ('ALIGN', (0,0), (0,-1), 'CENTER'),
+            ('FONTNAME', (0,0), (-1,-1), 'Helvetica'), ('FONTSIZE', (0,0), (-1,-1), 9),
+            ('ALIGN', (1,1), (1,1), 'CENTER'),
+            ('ALIGN', (2,1), (2,1), 'CENTER'),
+        ])
+
+        # --- BERITA ACARA PENERIMAAN BBM / FUEL (Layout Final) ---
+        # Header Berita Acara (Menggabungkan 4 kolom)
+        header_ba_data = [
+            [Paragraph("BERITA ACARA PENERIMAAN BBM / FUEL", styles['Normal'])],
+            [Paragraph("Barang / BBM Solar telah di terima dan telah di periksa sebagaimana berikut :", styles['BeritaAcaraTitle'])]
+        ]
+        header_ba_table = Table(header_ba_data, colWidths=[LEBAR_KONTEN_TENGAH])
+        header_ba_table.setStyle(TableStyle([
+            ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+            ('FONTNAME', (0,0), (-1,-1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0,0), (-1,-1), 10),
+        ]))
+        self.berita_acara_header = [_centered(header_ba_table)]
+
+        # Baris tabel penerimaan; baris 2 (Volume dikirim) diisi per DO
+        self.penerimaan_rows = [
+            # Col Widths: 1cm | 6.5cm | 5.75cm | 5.75cm -> Total 19.0 cm
+
+            # Baris 1: Mutu Barang
+            [
+                Paragraph("1", styles['CenterAlignSmall']),
+                "Mutu Barang / Kualitas BBM Solar",
+                Paragraph("a. Baik", styles['CenterAlignSmall']),
+                Paragraph("b. Buruk", styles['CenterAlignSmall'])
+            ],
+            # Baris 2: Volume (kolom 2 diisi per DO)
+            [
+                Paragraph("2", styles['CenterAlignSmall']),
+                None,
+                Paragraph("Volume diterima :", styles['NormalSmall']),
+                Paragraph("............... Liter", styles['NormalSmall']),
+            ],
+            # Baris 3: Segel Atas
+            [
+                Paragraph("3", styles['CenterAlignSmall']),
+                "Segel Atas No. ..........................",
+                Paragraph("a. Baik", styles['CenterAlignSmall']),
+                Paragraph("b. Rusak/ Terputus", styles['CenterAlignSmall'])
+            ],
+            # Baris 4: Segel Bawah
+            [
+                Paragraph("4", styles['CenterAlignSmall']),
+                "Segel Bawah No. .......................",
+                Paragraph("a. Baik", styles['CenterAlignSmall']),
+                Paragraph("b. Rusak/ Terputus", styles['CenterAlignSmall'])
+            ],
+            # Baris 5: Ketinggian T2 - KOREKSI DATA UNTUK GABUNG KOLOM 3 & 4
+            [
+                Paragraph("5", styles['CenterAlignSmall']),
+                "Ketinggian T2 (After Loading)",
+                Paragraph("Tepat / Lebih / Kurang (____ cm ____ ml)", styles['CenterAlignSmall']),
+                "", # Kolom kosong karena digabungkan oleh TableStyle
+            ],
+        ]
+        self.penerimaan_style = TableStyle([
+            ('GRID', (0,0), (-1,-1), 0.5, colors.black),
+            ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+            ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
+            ('FONTSIZE', (0,0), (-1,-1), 9),
+
+            # Kolom No.
+            ('ALIGN', (0,0), (0,-1), 'CENTER'),
+
+            # Kolom Deskripsi Kiri (Mutu, Segel)
+            ('ALIGN', (1,0), (1,0), 'LEFT'),
+            ('ALIGN', (1,2), (1,4), 'LEFT'),
+
+            # Kolom Volume dikirim (Rata Kiri)
+            ('ALIGN', (1,1), (1,1), 'LEFT'),
+
+            # Kolom Volume diterima (Label Rata Kanan, Nilai Rata Kiri)
+            ('ALIGN', (2,1), (2,1), 'RIGHT'),
+            ('ALIGN', (3,1), (3,1), 'LEFT'),
+
+            # Kolom Opsi Centang (Rata Tengah)
+            ('ALIGN', (2,0), (2,0), 'CENTER'), ('ALIGN', (3,0), (3,0), 'CENTER'), # Mutu
+            ('ALIGN', (2,2), (2,3), 'CENTER'), ('ALIGN', (3,2), (3,3), 'CENTER'), # Segel
+
+            # Ketinggian (Gabungkan Kolom 3 & 4, Rata Tengah)
+            ('SPAN', (2, 4), (3, 4)),
+            ('ALIGN', (2, 4), (3, 4), 'CENTER'),
+
+        ])
+
+        # --- Catatan & TTD Footer ---
+        ttd_data = [
+            ["Dikirim Oleh,", "", "Diterima Oleh,"],
+            ["TTD PENGANTAR", "", "TTD PENERIMA"],
+            ["", "", ""],
+            ["", "", ""],
+            ["Nama dan Tanggal", "", "Nama dan Tanggal"],
+        ]
+        ttd_table = Table(ttd_data, colWidths=[7.5*cm, 4.0*cm, 7.5*cm])
+        ttd_table.setStyle(TableStyle([
+            ('VALIGN', (0,0), (-1,-1), 'TOP'), ('ALIGN', (0,0), (0,-1), 'CENTER'),
+            ('ALIGN', (2,0), (2,-1), 'CENTER'), ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
+            ('FONTSIZE', (0,0), (-1,-1), 10), ('LINEBELOW', (0,4), (0,4), 0.5, colors.black),
+            ('LINEBELOW', (2,4), (2,4), 0.5, colors.black), ('ROWHEIGHT', (0,2), (0,3), 1*cm),
+        ]))
+        self.footer = [
+            Spacer(1, 3*mm),
+            # Coment/Catatan
+            _centered(Paragraph("<b>Coment/Catatan:</b>", styles['Normal'])),
+            Spacer(1, 15*mm),
+            # Peringatan 1
+            _centered(Paragraph("BBM Solar Yang Sudah Diterima Dengan Baik Tidak Dapat Dikembalikan.", styles['FooterCenter'])),
+            # Peringatan 2
+            _centered(Paragraph("Tidak Menerima Keluhan Apabila BBM Solar Telah Diterima Dan Surat Jalan Telah Ditanda Tangani", styles['FooterCenter'])),
+            Spacer(1, 5*mm),
+            _centered(ttd_table),
+        ]
+
+    def _variable_elements(self, data_row):
+        """Susun hanya bagian yang berbeda per DO."""
+        styles = self.styles
+
+        # --- Data Mapping (Clean String) ---
+        do_num = str(data_row.get("NOMOR DO", ""))
+        attn = str(data_row.get("PIC Delivery", ""))
+        ship_to = str(data_row.get("Client", ""))
+        site_addr_1 = str(data_row.get("Site/Discharge Addr Line 1", ""))
+        site_addr_2 = str(data_row.get("Site/Discharge Addr Line 2", ""))
+        no_po = str(data_row.get("PO Client", ""))
+        # Pastikan Qty adalah float
+        qty = float(data_row.get("Qty", 0.0)) if pd.notna(data_row.get("Qty")) else 0.0
+        jenis_bbm = str(data_row.get("Jenis BBM", ""))
+        transportir = str(data_row.get("Transportir", ""))
+        fleet_no = str(data_row.get("Fleet Number", ""))
+        driver = str(data_row.get("Nama Driver", ""))
+
+        qty_display = f"{qty:,.0f}".replace(",", ".") # Format 16.000
+
+        # Konversi Date
+        date_display = _format_date(data_row.get("Date", ""))
+        tgl_po_display = _format_date(data_row.get("Tgl PO", ""))
+
+        # --- Info DO (Layout Rapi) ---
+        LEBAR_KOLOM_KIRI = 9.0*cm
+        LEBAR_KOLOM_KANAN = 10.0*cm
+
+        # KIRI (DO #, To, Attn.)
+        info_kiri_data = [
+            ["DO #", Paragraph(f": <b>{do_num}</b>", styles['BoldSmall'])],
+            ["To", self.to_value],
+            ["Attn.", Paragraph(f": <b>{attn}</b>", styles['BoldSmall'])],
+        ]
+        info_kiri_table = Table(info_kiri_data, colWidths=[1.5*cm, 7.5*cm])
+        info_kiri_table.setStyle(self.info_kiri_style)
+
+        # KANAN (Date, Ship To, Site, NO PO, Tgl PO, CP.)
+        site_gabungan = f"<b>{site_addr_1}</b><br/><b>{site_addr_2}</b>"
+        values = [
+            Paragraph(f"<b>{date_display}</b>", styles['BoldSmall']),
+            Paragraph(f"<b>{ship_to}</b>", styles['BoldSmall']),
+            Paragraph(site_gabungan, styles['BoldSmall']),
+            Paragraph(f"<b>{no_po}</b>", styles['BoldSmall']),
+            Paragraph(f"<b>{tgl_po_display}</b>", styles['BoldSmall']),
+            "",
+        ]
+        info_kanan_data = [[label, ":", value] for label, value in zip(self.info_kanan_labels, values)]
+        info_kanan_table = Table(info_kanan_data, colWidths=[3.5*cm, 0.2*cm, 6.3*cm])
+        info_kanan_table.setStyle(self.info_kanan_style)
+
+        info_gabungan_table = Table([[info_kiri_table, info_kanan_table]], colWidths=[LEBAR_KOLOM_KIRI, LEBAR_KOLOM_KANAN])
+        info_gabungan_table.setStyle(self.gabungan_style)
+
+        # --- Tabel Kuantitas ---
+        transportir_text = Paragraph(f"<b>{transportir}</b><br/>Fleet No. <b>{fleet_no}</b><br/>An. <b>{driver}</b>", styles['BoldSmall'])
+        qty_parag = Paragraph(f"<b>{qty_display}</b>", styles['HeaderTitle'])
+
+        items_data = [
+            ["No.", "Quantity", "Description", "Diangkut Oleh Transportir"],
+            ["1", qty_parag, jenis_bbm, transportir_text]
+        ]
+        items_table = Table(items_data, colWidths=[1.5*cm, 3.5*cm, 8.0*cm, 6.0*cm], rowHeights=[None, 1.8*cm])
+        items_table.setStyle(self.items_style)
+
+        # --- Tabel Penerimaan (hanya Volume dikirim yang variabel) ---
+        penerimaan_data = [list(row) for row in self.penerimaan_rows]
+        penerimaan_data[1][1] = Paragraph(f"Volume dikirim : <b>{qty_display}</b> Liter", styles['BoldSmall'])
+        penerimaan_table = Table(penerimaan_data, colWidths=[1*cm, 6.5*cm, 5.75*cm, 5.75*cm])
+        penerimaan_table.setStyle(self.penerimaan_style)
+
+        return (
+            [_centered(info_gabungan_table), Spacer(1, 5*mm),
+             _centered(items_table), Spacer(1, 5*mm)],
+            [_centered(penerimaan_table)],
+        )
+
+    def _page_elements(self, data_row):
+        info_items, penerimaan = self._variable_elements(data_row)
+        return self.header + self.title + info_items + self.berita_acara_header + penerimaan + self.footer
+
+    def render(self, data_row, output_path):
+        """Render satu Surat Jalan ke path file atau objek file (BytesIO)."""
+        self._build(self._page_elements(data_row), output_path)
+
+    def render_many(self, rows, output_path):
+        """Render banyak DO ke satu PDF, satu DO per halaman.
+
+        DO yang datanya gagal disusun dilewati. Mengembalikan (jumlah_do, daftar_error);
+        file tidak ditulis jika tidak ada DO yang berhasil.
+        """
+        elements, errors, count = [], [], 0
+        for row in rows:
+            try:
+                page = self._page_elements(row)
+            except Exception as e:
+                errors.append((str(row.get("NOMOR DO", "")), f"{type(e).__name__}: {e}"))
+                continue
+            if count:
+                elements.append(PageBreak())
+            elements += page
+            count += 1
+        if count:
+            self._build(elements, output_path)
+        return count, errors
+
+    def _build(self, elements, output_path):
+        # Mengatur margin menjadi sangat kecil (0.1 cm) agar KOP bisa lebar penuh
+        doc = SimpleDocTemplate(output_path, pagesize=A4,
+                                rightMargin=0.1*cm, leftMargin=0.1*cm,
+                                topMargin=0.1*cm, bottomMargin=0.1*cm)
+        with self._lock, _binary_streams():
+            doc.build(elements)
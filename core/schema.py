@@ -0,0 +1,15 @@
+"""Skema data DO yang dipakai bersama oleh semua halaman."""
+
+# --- Path Database ---
+# dbase.xlsx tetap menjadi format import/export; data aktif disimpan di SQLite.
+DB_PATH = "dbase.xlsx"
+SQLITE_PATH = "dbase.sqlite3"
+
+# --- Kolom Database ---
+NEW_COLUMNS = [
+    "No", "Month", "SPO-Letter", "NOMOR DO", "Date", "Source", "Transportir",
+    "Client", "Site/Discharge Addr Line 1", "Site/Discharge Addr Line 2",
+    "PO Client", "Tgl PO", "PO Pertamina", "PIC Delivery", "Qty", "Jenis BBM",
+    "Fleet Number", "Nama Driver", "Keterangan"
+]
+DATE_COLUMNS = ["Date", "Tgl PO"]
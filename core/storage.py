@@ -0,0 +1,595 @@
+"""Lapisan penyimpanan data DO berbasis SQLite (mode WAL).
+
+Setiap simpan, edit, dan hapus hanya menyentuh satu baris DO di dalam satu
+transaksi, sehingga tidak ada lagi penulisan ulang seluruh dbase.xlsx dan dua
+dispatcher yang menyimpan bersamaan tidak saling menimpa. File Excel tetap
+didukung lewat `import_xlsx` / `export_xlsx`.
+
+Nomor DO (format DDMMYY-NN) dibagikan oleh counter per hari di tabel
+`do_sequence`, sehingga dua sesi yang membuka form bersamaan tidak pernah
+mendapat nomor yang sama.
+
+Setiap perubahan baris DO (dari proses mana pun) dicatat trigger SQLite di
+tabel `change_log`; nomor urut terakhirnya adalah "versi data" yang dipakai
+cache bersama (core/data.py) untuk invalidasi yang tepat.
+
+Rekap liter dan jumlah DO per Periode x Month x Client x Jenis BBM disimpan di
+tabel `rekap_bulanan` dan diperbarui trigger yang sama (kurangi baris lama,
+tambah baris baru), sehingga halaman rekap tidak perlu menjumlah ulang
+seluruh DO mentah.
+"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+
+import pandas as pd
+
+from core.metrics import timed
+from core.schema import DATE_COLUMNS, DB_PATH, NEW_COLUMNS, SQLITE_PATH
+
+TABLE = "surat_jalan"
+SEQUENCE_TABLE = "do_sequence"
+RELEASED_TABLE = "do_released"
+CHANGE_LOG_TABLE = "change_log"
+CHANGE_LOG_KEEP = 10000  # Jumlah catatan perubahan terakhir yang disimpan
+ROLLUP_TABLE = "rekap_bulanan"
+COLUMN_TYPES = {"No": "INTEGER", "Qty": "REAL"}  # Kolom lain disimpan sebagai TEXT
+
+
+def _q(name):
+    """Quote nama kolom (banyak kolom mengandung spasi dan '/')."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+_COLS_SQL = ", ".join(_q(c) for c in NEW_COLUMNS)
+_PARAMS_SQL = ", ".join("?" for _ in NEW_COLUMNS)
+_UPDATE_SQL = ", ".join(f"{_q(c)} = excluded.{_q(c)}" for c in NEW_COLUMNS if c != "NOMOR DO")
+_UPSERT_SQL = (
+    f"INSERT INTO {TABLE} ({_COLS_SQL}) VALUES ({_PARAMS_SQL}) "
+    f"ON CONFLICT({_q('NOMOR DO')}) DO UPDATE SET {_UPDATE_SQL}"
+)
+_INSERT_SQL = f"INSERT INTO {TABLE} ({_COLS_SQL}) VALUES ({_PARAMS_SQL})"
+
+# Kunci rollup: periode 'YYYY-MM' dari kolom Date, Month, Client, Jenis BBM
+ROLLUP_KEYS = ["periode", "month", "client", "jenis_bbm"]
+ROLLUP_COLUMNS = {"periode": "Periode", "month": "Month", "client": "Client",
+                  "jenis_bbm": "Jenis BBM", "total_qty": "Qty", "jumlah_do": "Jumlah DO"}
+
+
+def _rollup_key_sql(ref):
+    """Ekspresi kunci rollup untuk baris NEW/OLD di trigger (atau tabel di SELECT)."""
+    prefix = f"{ref}." if ref else ""
+    return [
+        f"COALESCE(substr({prefix}{_q('Date')}, 1, 7), '')",
+        f"COALESCE({prefix}{_q('Month')}, '')",
+        f"COALESCE({prefix}{_q('Client')}, '')",
+        f"COALESCE({prefix}{_q('Jenis BBM')}, '')",
+    ]
+
+
+def _rollup_add_sql(ref):
+    keys = ", ".join(_rollup_key_sql(ref))
+    return (
+        f"INSERT INTO {ROLLUP_TABLE} ({', '.join(ROLLUP_KEYS)}, total_qty, jumlah_do) "
+        f"VALUES ({keys}, COALESCE({ref}.{_q('Qty')}, 0), 1) "
+        f"ON CONFLICT({', '.join(ROLLUP_KEYS)}) DO UPDATE SET "
+        "total_qty = total_qty + excluded.total_qty, jumlah_do = jumlah_do + 1;"
+    )
+
+
+def _rollup_remove_sql(ref):
+    where = " AND ".join(f"{k} = {v}" for k, v in zip(ROLLUP_KEYS, _rollup_key_sql(ref)))
+    return (
+        f"UPDATE {ROLLUP_TABLE} SET total_qty = total_qty - COALESCE({ref}.{_q('Qty')}, 0), "
+        f"jumlah_do = jumlah_do - 1 WHERE {where}; "
+        f"DELETE FROM {ROLLUP_TABLE} WHERE jumlah_do <= 0;"
+    )
+
+
+def _is_missing(value):
+    if value is None:
+        return True
+    try:
+        return bool(pd.isna(value))
+    except (TypeError, ValueError):
+        return False
+
+
+def _format_date(value):
+    """Normalisasi tanggal ke string 'YYYY-MM-DD' (format yang dipakai sejak awal)."""
+    if _is_missing(value) or value == "":
+        return None
+    if isinstance(value, (datetime, date)):
+        return value.strftime("%Y-%m-%d")
+    parsed = pd.to_datetime(str(value), errors="coerce")
+    return parsed.strftime("%Y-%m-%d") if pd.notna(parsed) else str(value)
+
+
+def do_prefix(do_number):
+    """Bagian tanggal dari NOMOR DO (DDMMYY-NN -> DDMMYY)."""
+    return str(do_number).rpartition("-")[0]
+
+
+def to_record(row):
+    """Ubah satu baris (dict / Series) menjadi tuple nilai sesuai urutan NEW_COLUMNS."""
+    values = []
+    for col in NEW_COLUMNS:
+        value = row.get(col)
+        if col in DATE_COLUMNS:
+            value = _format_date(value)
+        elif _is_missing(value):
+            value = None
+        elif col == "No":
+            value = int(value)
+        elif col == "Qty":
+            value = pd.to_numeric(value, errors="coerce")
+            value = None if pd.isna(value) else float(value)
+        else:
+            value = str(value)
+        values.append(value)
+    return tuple(values)
+
+
+class SQLiteStorage:
+    """Repository DO: satu baris per NOMOR DO di tabel SQLite."""
+
+    def __init__(self, path=SQLITE_PATH, import_from=DB_PATH):
+        self.path = path
+        self._init_schema(import_from)
+        self.prune_change_log()
+
+    # --- Koneksi & Transaksi ---
+    @contextmanager
+    def connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA busy_timeout = 30000")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def transaction(self):
+        """Transaksi tulis; BEGIN IMMEDIATE mengunci penulis lain sampai COMMIT."""
+        with self.connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _init_schema(self, import_from):
+        columns = ", ".join(
+            f"{_q(c)} {COLUMN_TYPES.get(c, 'TEXT')}" + (" PRIMARY KEY" if c == "NOMOR DO" else "")
+            for c in NEW_COLUMNS
+        )
+        with self.connect() as conn:
+            conn.execute("PRAGMA journal_mode = WAL")
+        with self.transaction() as conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {TABLE} ({columns})")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABLE}_no ON {TABLE} ({_q('No')})")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {SEQUENCE_TABLE} "
+                "(tanggal TEXT PRIMARY KEY, last_seq INTEGER NOT NULL)"
+            )
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {RELEASED_TABLE} "
+                "(tanggal TEXT NOT NULL, seq INTEGER NOT NULL, PRIMARY KEY (tanggal, seq))"
+            )
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {CHANGE_LOG_TABLE} "
+                "(version INTEGER PRIMARY KEY AUTOINCREMENT, nomor_do TEXT NOT NULL, op TEXT NOT NULL)"
+            )
+            key = _q("NOMOR DO")
+            for event, ref, op in [("INSERT", "NEW", "upsert"), ("UPDATE", "NEW", "upsert"), ("DELETE", "OLD", "delete")]:
+                conn.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS trg_{TABLE}_{event.lower()} AFTER {event} ON {TABLE} BEGIN "
+                    f"INSERT INTO {CHANGE_LOG_TABLE} (nomor_do, op) VALUES ({ref}.{key}, '{op}'); END"
+                )
+            has_rollup = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (ROLLUP_TABLE,)
+            ).fetchone() is not None
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {ROLLUP_TABLE} ("
+                "periode TEXT NOT NULL, month TEXT NOT NULL, client TEXT NOT NULL, jenis_bbm TEXT NOT NULL, "
+                "total_qty REAL NOT NULL DEFAULT 0, jumlah_do INTEGER NOT NULL DEFAULT 0, "
+                f"PRIMARY KEY ({', '.join(ROLLUP_KEYS)}))"
+            )
+            rollup_body = {
+                "INSERT": _rollup_add_sql("NEW"),
+                "UPDATE": _rollup_remove_sql("OLD") + " " + _rollup_add_sql("NEW"),
+                "DELETE": _rollup_remove_sql("OLD"),
+            }
+            for event, body in rollup_body.items():
+                conn.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS trg_{TABLE}_{event.lower()}_rollup "
+                    f"AFTER {event} ON {TABLE} BEGIN {body} END"
+                )
+            if not has_rollup:
+                # Database lama tanpa tabel rollup: hitung sekali dari data yang ada
+                self._rebuild_rollup(conn)
+            is_empty = conn.execute(f"SELECT 1 FROM {TABLE} LIMIT 1").fetchone() is None
+            # Migrasi otomatis: saat pertama kali dipakai, isi dari dbase.xlsx lama
+            if is_empty and import_from and os.path.exists(import_from):
+                self._insert_frame(conn, pd.read_excel(import_from, engine="openpyxl"))
+
+    # --- Baca ---
+    def load_frame(self):
+        """Memuat seluruh data DO sebagai DataFrame (urut kolom No)."""
+        return self.load_frame_versioned()[0]
+
+    @timed("storage.load_frame")
+    def load_frame_versioned(self):
+        """Seperti `load_frame`, plus versi data dari snapshot baca yang sama."""
+        with self.connect() as conn:
+            conn.execute("BEGIN")
+            version = self._data_version(conn)
+            df = pd.read_sql_query(f"SELECT {_COLS_SQL} FROM {TABLE} ORDER BY {_q('No')}", conn)
+            conn.execute("COMMIT")
+        for col in DATE_COLUMNS:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+        return df, version
+
+    def data_version(self):
+        """Versi data saat ini (naik setiap ada baris DO yang berubah)."""
+        with self.connect() as conn:
+            return self._data_version(conn)
+
+    def _data_version(self, conn):
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (CHANGE_LOG_TABLE,)).fetchone()
+        return row[0] if row else 0
+
+    @timed("storage.changes_since")
+    def changes_since(self, version, limit):
+        """Perubahan setelah `version` sebagai (versi_baru, {nomor_do: record atau None}).
+
+        Mengembalikan None jika perubahan lebih dari `limit` atau catatannya
+        sudah terpangkas (pemanggil sebaiknya memuat ulang seluruh data).
+        """
+        with self.connect() as conn:
+            conn.execute("BEGIN")
+            try:
+                new_version = self._data_version(conn)
+                oldest = conn.execute(f"SELECT MIN(version) FROM {CHANGE_LOG_TABLE}").fetchone()[0]
+                if new_version > version and (oldest is None or oldest > version + 1):
+                    return None
+                numbers = [r[0] for r in conn.execute(
+                    f"SELECT nomor_do FROM {CHANGE_LOG_TABLE} WHERE version > ? ORDER BY version LIMIT ?",
+                    (version, limit + 1),
+                )]
+                if len(numbers) > limit:
+                    return None
+                changed = dict.fromkeys(numbers)  # Urut sesuai perubahan, tanpa duplikat
+                if changed:
+                    params = ", ".join("?" for _ in changed)
+                    for row in conn.execute(
+                        f"SELECT {_COLS_SQL} FROM {TABLE} WHERE {_q('NOMOR DO')} IN ({params})", list(changed)
+                    ):
+                        changed[row[NEW_COLUMNS.index("NOMOR DO")]] = dict(zip(NEW_COLUMNS, row))
+                return new_version, changed
+            finally:
+                conn.execute("COMMIT")
+
+    @timed("storage.load_rollup")
+    def load_rollup_versioned(self):
+        """Rekap per Periode/Month/Client/Jenis BBM (kolom 'Qty', 'Jumlah DO') plus versi data."""
+        with self.connect() as conn:
+            conn.execute("BEGIN")
+            version = self._data_version(conn)
+            df = pd.read_sql_query(
+                f"SELECT {', '.join(ROLLUP_COLUMNS)} FROM {ROLLUP_TABLE} ORDER BY {', '.join(ROLLUP_KEYS)}", conn
+            )
+            conn.execute("COMMIT")
+        return df.rename(columns=ROLLUP_COLUMNS), version
+
+    def rebuild_rollup(self):
+        """Hitung ulang seluruh tabel rollup dari data DO (untuk perbaikan manual)."""
+        with self.transaction() as conn:
+            self._rebuild_rollup(conn)
+
+    def _rebuild_rollup(self, conn):
+        keys = _rollup_key_sql(None)
+        conn.execute(f"DELETE FROM {ROLLUP_TABLE}")
+        conn.execute(
+            f"INSERT INTO {ROLLUP_TABLE} ({', '.join(ROLLUP_KEYS)}, total_qty, jumlah_do) "
+            f"SELECT {', '.join(keys)}, COALESCE(SUM({_q('Qty')}), 0), COUNT(*) FROM {TABLE} "
+            f"GROUP BY {', '.join(keys)}"
+        )
+
+    @timed("storage.read_prefixes")
+    def read_prefixes_since(self, version):
+        """Baca baris DO yang prefix nomornya berubah setelah `version` (untuk backup).
+
+        Mengembalikan (versi_baru, prefix_berubah, rows) dari satu snapshot baca;
+        `rows` berisi tuple nilai NEW_COLUMNS. `prefix_berubah` None berarti
+        seluruh data dibaca (versi None atau catatan perubahan sudah terpangkas).
+        """
+        with self.connect() as conn:
+            conn.execute("BEGIN")
+            try:
+                new_version = self._data_version(conn)
+                prefixes = None
+                if version is not None:
+                    oldest = conn.execute(f"SELECT MIN(version) FROM {CHANGE_LOG_TABLE}").fetchone()[0]
+                    if new_version == version:
+                        return new_version, set(), []
+                    if oldest is not None and oldest <= version + 1:
+                        prefixes = {do_prefix(r[0]) for r in conn.execute(
+                            f"SELECT DISTINCT nomor_do FROM {CHANGE_LOG_TABLE} WHERE version > ?", (version,)
+                        )}
+                if prefixes is None or "" in prefixes:
+                    rows = conn.execute(f"SELECT {_COLS_SQL} FROM {TABLE}").fetchall()
+                    if prefixes is not None:
+                        key = NEW_COLUMNS.index("NOMOR DO")
+                        rows = [r for r in rows if do_prefix(r[key]) in prefixes]
+                else:
+                    rows = []
+                    for prefix in prefixes:
+                        # Range scan primary key, lalu pastikan prefix persis sama
+                        rows.extend(r for r in conn.execute(
+                            f"SELECT {_COLS_SQL} FROM {TABLE} WHERE {_q('NOMOR DO')} > ? AND {_q('NOMOR DO')} < ?",
+                            (f"{prefix}-", f"{prefix}."),
+                        ) if do_prefix(r[NEW_COLUMNS.index("NOMOR DO")]) == prefix)
+                return new_version, prefixes, rows
+            finally:
+                conn.execute("COMMIT")
+
+    @timed("storage.get_do")
+    def get_do(self, do_number):
+        """Ambil satu DO sebagai dict, atau None jika tidak ada."""
+        with self.connect() as conn:
+            row = conn.execute(
+                f"SELECT {_COLS_SQL} FROM {TABLE} WHERE {_q('NOMOR DO')} = ?", (do_number,)
+            ).fetchone()
+        return dict(zip(NEW_COLUMNS, row)) if row else None
+
+    def exists(self, do_number):
+        with self.connect() as conn:
+            return conn.execute(
+                f"SELECT 1 FROM {TABLE} WHERE {_q('NOMOR DO')} = ?", (do_number,)
+            ).fetchone() is not None
+
+    def existing_do_numbers(self, do_numbers):
+        """Himpunan NOMOR DO dari `do_numbers` yang sudah tersimpan."""
+        with self.connect() as conn:
+            return self._existing(conn, do_numbers)
+
+    def _existing(self, conn, do_numbers):
+        do_numbers = list(dict.fromkeys(n for n in do_numbers if n))
+        found = set()
+        for start in range(0, len(do_numbers), 500):  # Batas parameter SQLite
+            chunk = do_numbers[start:start + 500]
+            found.update(r[0] for r in conn.execute(
+                f"SELECT {_q('NOMOR DO')} FROM {TABLE} WHERE {_q('NOMOR DO')} IN ({', '.join('?' * len(chunk))})", chunk
+            ))
+        return found
+
+    # --- Tulis (satu baris per operasi) ---
+    @timed("storage.upsert_do")
+    def upsert_do(self, row, conn=None):
+        """Simpan DO baru atau perbarui DO lama. Mengembalikan True jika DO sudah ada.
+
+        Seperti perilaku lama, DO yang diedit mendapat nomor urut 'No' baru
+        sehingga tampil sebagai data terakhir. Dengan `conn` (dari
+        `transaction()`) penulisan ikut transaksi pemanggil.
+        """
+        if conn is not None:
+            return self._upsert_do(conn, row)
+        with self.transaction() as conn:
+            return self._upsert_do(conn, row)
+
+    def _upsert_do(self, conn, row):
+        data = dict(row)
+        existed = conn.execute(
+            f"SELECT 1 FROM {TABLE} WHERE {_q('NOMOR DO')} = ?", (data["NOMOR DO"],)
+        ).fetchone() is not None
+        data["No"] = self._next_no(conn)
+        conn.execute(_UPSERT_SQL, to_record(data))
+        return existed
+
+    @timed("storage.create_do")
+    def create_do(self, row, when=None):
+        """Simpan DO baru tanpa menimpa DO lama (untuk API).
+
+        Tanpa 'NOMOR DO' nomor baru hari ini dipesan di transaksi yang sama.
+        Mengembalikan NOMOR DO, atau None jika nomor yang diberikan sudah dipakai.
+        """
+        data = dict(row)
+        with self.transaction() as conn:
+            if _is_missing(data.get("NOMOR DO")) or data.get("NOMOR DO") == "":
+                prefix = (when or datetime.now()).strftime("%d%m%y")
+                data["NOMOR DO"] = self._reserve_block(conn, prefix, 1)[0]
+            elif conn.execute(
+                f"SELECT 1 FROM {TABLE} WHERE {_q('NOMOR DO')} = ?", (data["NOMOR DO"],)
+            ).fetchone() is not None:
+                return None
+            data["No"] = self._next_no(conn)
+            conn.execute(_UPSERT_SQL, to_record(data))
+        return data["NOMOR DO"]
+
+    @timed("storage.insert_many")
+    def insert_many(self, rows, when=None):
+        """Simpan banyak DO dalam satu transaksi (import massal).
+
+        Baris tanpa 'NOMOR DO' mendapat nomor baru hari ini sebagai satu blok
+        berurutan; baris yang membawa nomor hanya boleh memakai nomor baru.
+        Jika ada nomor yang sudah tersimpan tidak ada baris yang ditulis
+        (ValueError), sama seperti `create_do` tidak menimpa DO lama.
+        Mengembalikan list NOMOR DO sesuai urutan `rows`.
+        """
+        rows = [dict(r) for r in rows]
+        prefix = (when or datetime.now()).strftime("%d%m%y")
+        with self.transaction() as conn:
+            missing, given = [], []
+            for r in rows:
+                (missing if _is_missing(r.get("NOMOR DO")) or r.get("NOMOR DO") == "" else given).append(r)
+            taken = self._existing(conn, [r["NOMOR DO"] for r in given])
+            if taken:
+                raise ValueError(f"NOMOR DO sudah ada di database: {', '.join(sorted(taken))}")
+            for row, do_number in zip(missing, self._reserve_block(conn, prefix, len(missing))):
+                row["NOMOR DO"] = do_number
+            next_no = self._next_no(conn)
+            for offset, row in enumerate(rows):
+                row["No"] = next_no + offset
+            conn.executemany(_INSERT_SQL, (to_record(r) for r in rows))
+        return [r["NOMOR DO"] for r in rows]
+
+    @timed("storage.replace_all")
+    def replace_all(self, records):
+        """Ganti seluruh data DO dengan `records` (tuple nilai NEW_COLUMNS) dalam satu transaksi."""
+        with self.transaction() as conn:
+            conn.execute(f"DELETE FROM {TABLE}")
+            conn.executemany(_UPSERT_SQL, records)
+            return conn.execute(f"SELECT COUNT(*) FROM {TABLE}").fetchone()[0]
+
+    @timed("storage.delete_do")
+    def delete_do(self, do_number):
+        """Hapus satu DO. Mengembalikan True jika ada baris yang terhapus."""
+        with self.transaction() as conn:
+            cur = conn.execute(f"DELETE FROM {TABLE} WHERE {_q('NOMOR DO')} = ?", (do_number,))
+            return cur.rowcount > 0
+
+    # --- Alokasi Nomor DO ---
+    @timed("do.reserve_number")
+    def reserve_do_number(self, when=None):
+        """Pesan nomor DO berikutnya untuk hari ini secara atomik (DDMMYY-NN).
+
+        Nomor yang dilepas draft yang batal dipakai ulang lebih dulu; jika tidak
+        ada, counter harian dinaikkan. Semua di bawah kunci tulis SQLite.
+        """
+        prefix = (when or datetime.now()).strftime("%d%m%y")
+        with self.transaction() as conn:
+            while True:
+                row = conn.execute(
+                    f"SELECT seq FROM {RELEASED_TABLE} WHERE tanggal = ? ORDER BY seq LIMIT 1", (prefix,)
+                ).fetchone()
+                if row:
+                    seq = row[0]
+                    conn.execute(f"DELETE FROM {RELEASED_TABLE} WHERE tanggal = ? AND seq = ?", (prefix, seq))
+                else:
+                    seq = self._last_sequence(conn, prefix) + 1
+                    conn.execute(
+                        f"INSERT INTO {SEQUENCE_TABLE} (tanggal, last_seq) VALUES (?, ?) "
+                        "ON CONFLICT(tanggal) DO UPDATE SET last_seq = excluded.last_seq",
+                        (prefix, seq),
+                    )
+                do_number = f"{prefix}-{seq:02d}"
+                # Jaga-jaga jika ada data hasil import yang sudah memakai nomor ini
+                if conn.execute(
+                    f"SELECT 1 FROM {TABLE} WHERE {_q('NOMOR DO')} = ?", (do_number,)
+                ).fetchone() is None:
+                    return do_number
+
+    @timed("do.release_number")
+    def release_do_number(self, do_number):
+        """Kembalikan nomor DO dari draft yang batal disimpan.
+
+        Tidak melakukan apa-apa jika DO tersebut sudah tersimpan. Mengembalikan
+        True jika nomor berhasil dilepas.
+        """
+        prefix, _, seq = str(do_number).rpartition("-")
+        if not prefix or not seq.isdigit():
+            return False
+        seq = int(seq)
+        with self.transaction() as conn:
+            if conn.execute(
+                f"SELECT 1 FROM {TABLE} WHERE {_q('NOMOR DO')} = ?", (do_number,)
+            ).fetchone() is not None:
+                return False
+            if seq == self._last_sequence(conn, prefix):
+                # Nomor terakhir: cukup turunkan counter (beserta nomor lepas di bawahnya)
+                seq -= 1
+                while conn.execute(
+                    f"DELETE FROM {RELEASED_TABLE} WHERE tanggal = ? AND seq = ?", (prefix, seq)
+                ).rowcount:
+                    seq -= 1
+                conn.execute(f"UPDATE {SEQUENCE_TABLE} SET last_seq = ? WHERE tanggal = ?", (seq, prefix))
+            else:
+                conn.execute(
+                    f"INSERT OR IGNORE INTO {RELEASED_TABLE} (tanggal, seq) VALUES (?, ?)", (prefix, seq)
+                )
+        return True
+
+    def _reserve_block(self, conn, prefix, count):
+        """Naikkan counter harian sekaligus untuk `count` nomor (lewati nomor yang sudah terpakai)."""
+        if count <= 0:
+            return []
+        seq = self._last_sequence(conn, prefix)
+        used = {r[0] for r in conn.execute(
+            f"SELECT {_q('NOMOR DO')} FROM {TABLE} WHERE {_q('NOMOR DO')} > ? AND {_q('NOMOR DO')} < ?",
+            (f"{prefix}-", f"{prefix}."),
+        )}
+        numbers = []
+        while len(numbers) < count:
+            seq += 1
+            if f"{prefix}-{seq:02d}" not in used:
+                numbers.append(f"{prefix}-{seq:02d}")
+        conn.execute(
+            f"INSERT INTO {SEQUENCE_TABLE} (tanggal, last_seq) VALUES (?, ?) "
+            "ON CONFLICT(tanggal) DO UPDATE SET last_seq = excluded.last_seq",
+            (prefix, seq),
+        )
+        return numbers
+
+    def _last_sequence(self, conn, prefix):
+        row = conn.execute(f"SELECT last_seq FROM {SEQUENCE_TABLE} WHERE tanggal = ?", (prefix,)).fetchone()
+        if row:
+            return row[0]
+        # Belum ada counter untuk hari ini: hitung sekali dari DO yang sudah tersimpan
+        # (range scan pada primary key, hanya DO hari tersebut)
+        numbers = conn.execute(
+            f"SELECT {_q('NOMOR DO')} FROM {TABLE} WHERE {_q('NOMOR DO')} >= ? AND {_q('NOMOR DO')} < ?",
+            (f"{prefix}-", f"{prefix}."),
+        ).fetchall()
+        sequences = [int(n[0].rpartition("-")[2]) for n in numbers if n[0].rpartition("-")[2].isdigit()]
+        return max(sequences, default=0)
+
+    def prune_change_log(self, keep=CHANGE_LOG_KEEP):
+        """Buang catatan perubahan lama (cache yang tertinggal jauh akan memuat ulang)."""
+        with self.transaction() as conn:
+            conn.execute(
+                f"DELETE FROM {CHANGE_LOG_TABLE} WHERE version <= ?", (self._data_version(conn) - keep,)
+            )
+
+    def _next_no(self, conn):
+        max_no = conn.execute(f"SELECT MAX({_q('No')}) FROM {TABLE}").fetchone()[0]
+        return (max_no or 0) + 1
+
+    # --- Import / Export Excel ---
+    def _insert_frame(self, conn, df):
+        df = df.reindex(columns=NEW_COLUMNS)
+        df = df[df["NOMOR DO"].notna()]
+        # Upsert (bukan INSERT OR REPLACE) agar trigger UPDATE ikut mengoreksi rollup
+        conn.executemany(_UPSERT_SQL, (to_record(row) for row in df.to_dict("records")))
+        return len(df)
+
+    @timed("storage.import_xlsx")
+    def import_xlsx(self, source, replace=False):
+        """Import data dari file Excel berformat dbase.xlsx. Mengembalikan jumlah baris."""
+        df = pd.read_excel(source, engine="openpyxl")
+        with self.transaction() as conn:
+            if replace:
+                conn.execute(f"DELETE FROM {TABLE}")
+            return self._insert_frame(conn, df)
+
+    @timed("storage.export_xlsx")
+    def export_xlsx(self, target):
+        """Export seluruh data ke Excel dengan tata letak kolom dbase.xlsx."""
+        self.load_frame().to_excel(target, index=False)
+
+
+_storages = {}
+_storages_lock = threading.Lock()
+
+
+def get_storage(path=SQLITE_PATH):
+    """Instance storage bersama per path (satu per proses)."""
+    with _storages_lock:
+        if path not in _storages:
+            _storages[path] = SQLiteStorage(path)
+        return _storages[path]
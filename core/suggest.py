@@ -0,0 +1,126 @@
+"""Index saran isian (autocomplete) dari riwayat DO.
+
+Untuk setiap kolom isian berulang (Client, Site, PIC, Fleet, Driver) disimpan
+jumlah pemakaian tiap nilai dan daftar nilai terurut (huruf kecil) sehingga
+pencarian awalan cukup `bisect` ke rentang yang cocok, bukan scan DataFrame.
+Per client juga dicatat nilai Site/PIC setiap DO (beserta nomor urut `No`)
+sehingga DO terakhir client tetap benar setelah DO diedit atau dihapus.
+
+Index dibangun sekali dari frame (per versi data, lewat `DOIndex.suggestions`)
+lalu diperbarui per baris saat DO disimpan atau dihapus.
+"""
+import bisect
+import heapq
+import threading
+
+import pandas as pd
+
+SUGGEST_FIELDS = [
+    "Client",
+    "Site/Discharge Addr Line 1",
+    "Site/Discharge Addr Line 2",
+    "PIC Delivery",
+    "Fleet Number",
+    "Nama Driver",
+]
+# Kolom yang diisi otomatis dari DO terakhir milik client yang dipilih
+CLIENT_DEFAULT_FIELDS = ["Site/Discharge Addr Line 1", "Site/Discharge Addr Line 2", "PIC Delivery"]
+
+
+def _clean(value):
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ""
+    return str(value).strip()
+
+
+class SuggestIndex:
+    def __init__(self, df):
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._keys = {}
+        self._top = {}
+        for field in SUGGEST_FIELDS:
+            values = df[field].dropna().astype(str).str.strip()
+            counts = values[values != ""].value_counts()
+            self._counts[field] = dict(zip(counts.index, counts.to_numpy().tolist()))
+            self._keys[field] = sorted((value.casefold(), value) for value in self._counts[field])
+
+        # client -> {NOMOR DO: (No, nilai Site/PIC mentah)}; DO terakhir = No terbesar
+        self._client_rows = {}
+        self._last = {}  # Cache DO terakhir per client, dibuang saat DO client berubah
+        clients = df["Client"].fillna("").astype(str).str.strip()
+        rows = df.loc[clients != "", ["NOMOR DO", "No"] + CLIENT_DEFAULT_FIELDS]
+        # tolist() per kolom: iterasi nilai satu per satu di kolom string pandas jauh lebih lambat
+        values = zip(*(rows[field].tolist() for field in CLIENT_DEFAULT_FIELDS))
+        for client, do_number, no, row_values in zip(
+            clients[clients != ""].tolist(), rows["NOMOR DO"].tolist(), rows["No"].tolist(), values
+        ):
+            self._client_rows.setdefault(client, {})[do_number] = (no, row_values)
+
+    # --- Pencarian ---
+    def search(self, field, prefix="", limit=10):
+        """Nilai `field` yang diawali `prefix` (tanpa beda huruf besar/kecil), paling sering dipakai dulu."""
+        with self._lock:
+            if not prefix:
+                if field not in self._top:
+                    counts = self._counts[field]
+                    self._top[field] = [v for v, _ in sorted(counts.items(), key=lambda kv: (-kv[1], kv[0].casefold()))]
+                return self._top[field][:limit]
+            prefix = prefix.strip().casefold()
+            keys = self._keys[field]
+            lo = bisect.bisect_left(keys, (prefix,))
+            hi = bisect.bisect_left(keys, (prefix + "\U0010ffff",), lo)
+            counts = self._counts[field]
+            return heapq.nsmallest(limit, (value for _, value in keys[lo:hi]), key=lambda v: (-counts[v], v.casefold()))
+
+    def last_for_client(self, client):
+        """Nilai Site/PIC dari DO terakhir `client`, atau None jika client belum pernah ada."""
+        client = _clean(client)
+        with self._lock:
+            if client not in self._last:
+                rows = self._client_rows.get(client)
+                if not rows:
+                    return None
+                _, values = max(rows.values(), key=lambda entry: -1 if pd.isna(entry[0]) else entry[0])
+                self._last[client] = {field: _clean(value) for field, value in zip(CLIENT_DEFAULT_FIELDS, values)}
+            return dict(self._last[client])
+
+    # --- Update inkremental (dipanggil DOIndex) ---
+    def add(self, row):
+        with self._lock:
+            for field in SUGGEST_FIELDS:
+                value = _clean(row.get(field))
+                if not value:
+                    continue
+                counts = self._counts[field]
+                if value not in counts:
+                    counts[value] = 0
+                    bisect.insort(self._keys[field], (value.casefold(), value))
+                counts[value] += 1
+                self._top.pop(field, None)
+            client = _clean(row.get("Client"))
+            if client:
+                values = [row.get(field) for field in CLIENT_DEFAULT_FIELDS]
+                self._client_rows.setdefault(client, {})[row.get("NOMOR DO")] = (row.get("No"), values)
+                self._last.pop(client, None)
+
+    def remove(self, row):
+        """Kurangi hitungan nilai milik DO yang dihapus/diganti; DO terakhir client dihitung ulang."""
+        with self._lock:
+            client = _clean(row.get("Client"))
+            rows = self._client_rows.get(client)
+            if rows is not None and rows.pop(row.get("NOMOR DO"), None) is not None:
+                if not rows:
+                    del self._client_rows[client]
+                self._last.pop(client, None)
+            for field in SUGGEST_FIELDS:
+                value = _clean(row.get(field))
+                counts = self._counts[field]
+                if value not in counts:
+                    continue
+                counts[value] -= 1
+                if counts[value] <= 0:
+                    del counts[value]
+                    keys = self._keys[field]
+                    del keys[bisect.bisect_left(keys, (value.casefold(), value))]
+                self._top.pop(field, None)
@@ -0,0 +1,101 @@
+"""Tema bersama semua halaman: background aplikasi.
+
+Gambar background diperkecil & dikompres sekali (WebP, atau JPEG jika Pillow
+tidak mendukung WebP), disimpan di folder `static/` dengan nama yang memuat
+kunci mtime/ukuran file sumber, lalu dilayani oleh static file serving
+Streamlit (`server.enableStaticServing`) sehingga browser bisa meng-cache-nya.
+Tidak ada lagi ~1.4 MB CSS base64 yang dikirim ulang di setiap interaksi.
+"""
+import base64
+import glob
+import hashlib
+import os
+import threading
+
+import streamlit as st
+
+# Folder 'static' harus berada di samping App.py agar dilayani di /app/static/
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static")
+MAX_WIDTH = 1920  # Resolusi layar; gambar yang lebih kecil tidak diperbesar
+QUALITY = 80
+
+_prepared = {}
+_prepared_lock = threading.Lock()
+
+
+def _encode(image_file, target):
+    from PIL import Image
+
+    with Image.open(image_file) as img:
+        img = img.convert("RGB")
+        if img.width > MAX_WIDTH:
+            img = img.resize((MAX_WIDTH, round(img.height * MAX_WIDTH / img.width)), Image.LANCZOS)
+        tmp = f"{target}.tmp"
+        if target.endswith(".webp"):
+            img.save(tmp, "WEBP", quality=QUALITY, method=6)
+        else:
+            img.save(tmp, "JPEG", quality=QUALITY, optimize=True, progressive=True)
+    os.replace(tmp, target)
+
+
+def prepare_background(image_file):
+    """Kembalikan (path_file_hasil, mime) untuk gambar background yang sudah dioptimasi.
+
+    Hasil di-cache per (path, mtime, ukuran) file sumber; encode hanya terjadi
+    sekali per versi gambar, termasuk lintas restart server.
+    """
+    stat = os.stat(image_file)
+    key = (os.path.abspath(image_file), stat.st_mtime_ns, stat.st_size)
+    with _prepared_lock:
+        if key in _prepared:
+            return _prepared[key]
+
+        from PIL import features
+        ext, mime = (".webp", "image/webp") if features.check("webp") else (".jpg", "image/jpeg")
+        stem = os.path.splitext(os.path.basename(image_file))[0]
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()[:12]
+        target = os.path.join(STATIC_DIR, f"{stem}_{digest}{ext}")
+        if not os.path.exists(target):
+            os.makedirs(STATIC_DIR, exist_ok=True)
+            # Hapus hasil versi lama dari gambar yang sama
+            for old in glob.glob(os.path.join(STATIC_DIR, f"{stem}_*")):
+                os.remove(old)
+            _encode(image_file, target)
+        _prepared[key] = (target, mime)
+        return _prepared[key]
+
+
+@st.cache_data(show_spinner=False)
+def _data_uri(path, mime):
+    # Cadangan jika static serving tidak aktif: tetap pakai gambar yang sudah dikecilkan
+    with open(path, "rb") as f:
+        return f"data:{mime};base64,{base64.b64encode(f.read()).decode()}"
+
+
+def set_background(image_file):
+    """
+    Menyuntikkan CSS kustom untuk mengatur gambar sebagai background aplikasi Streamlit.
+    """
+    path, mime = prepare_background(image_file)
+    if st.get_option("server.enableStaticServing"):
+        url = f"app/static/{os.path.basename(path)}"
+    else:
+        url = _data_uri(path, mime)
+
+    st.markdown(
+        f"""
+        <style>
+        .stApp {{
+            background-image: url("{url}");
+            background-size: cover;  /* Memastikan gambar menutupi seluruh background */
+            background-attachment: fixed; /* Membuat gambar tetap saat menggulir */
+            background-repeat: no-repeat;
+        }}
+        /* Menyesuaikan warna background sidebar agar tidak menutupi gambar */
+        .st-emotion-cache-12fmj7 {{ /* Ini adalah class untuk sidebar Streamlit */
+            background-color: rgba(30, 30, 30, 0.95); /* Sedikit transparan/gelap */
+        }}
+        </style>
+        """,
+        unsafe_allow_html=True
+    )
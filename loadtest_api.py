@@ -0,0 +1,245 @@
+"""Load test HTTP API (api.py) di satu mesin.
+
+Menjalankan server api.py di folder sementara (database berisi riwayat DO
+sintetis), lalu `--concurrency` klien asyncio dengan koneksi keep-alive
+mengirim campuran request selama `--duration` detik:
+
+- get    : GET /do/{nomor}
+- create : POST /do/reserve lalu POST /do dengan nomor tersebut
+- update : PUT /do/{nomor}
+- pdf    : GET /do/{nomor}/pdf (dirender di pool proses server)
+
+Hasil (request per detik dan latensi per operasi) ditulis sebagai JSON:
+
+    python loadtest_api.py --rows 10000 --concurrency 32 --duration 30 --output hasil_load.json
+    python loadtest_api.py --url http://127.0.0.1:8600 --duration 30   # server yang sudah jalan
+
+Generator beban berjalan di mesin yang sama, sehingga ikut memakai CPU.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+from benchmark import environment, synthetic_rows  # noqa: E402
+
+DEFAULT_MIX = {"get": 70, "create": 10, "update": 10, "pdf": 10}
+
+
+class Connection:
+    """Klien HTTP/1.1 minimal (keep-alive) di atas asyncio streams."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        data = json.dumps(body).encode() if body is not None else b""
+        head = (
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n\r\n"
+        )
+        self.writer.write(head.encode() + data)
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while (line := await self.reader.readline()) not in (b"\r\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if headers.get("transfer-encoding") == "chunked":
+            payload = b""
+            while size := int((await self.reader.readline()).strip(), 16):
+                payload += await self.reader.readexactly(size)
+                await self.reader.readline()
+            await self.reader.readline()
+        else:
+            payload = await self.reader.readexactly(int(headers.get("content-length", 0)))
+        if headers.get("connection") == "close":
+            await self.close()
+        return status, payload
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+async def wait_ready(host, port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while True:
+        conn = Connection(host, port)
+        try:
+            status, _ = await conn.request("GET", "/health")
+            if status == 200:
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+        finally:
+            await conn.close()
+        await asyncio.sleep(0.2)
+
+
+async def client(host, port, numbers, mix, stop_at, samples, errors, rng):
+    conn = Connection(host, port)
+    ops, weights = zip(*mix.items())
+    template = synthetic_rows(1, seed=rng.random())[0]
+    try:
+        while time.monotonic() < stop_at:
+            op = rng.choices(ops, weights)[0]
+            nomor = rng.choice(numbers)
+            t0 = time.perf_counter()
+            if op == "get":
+                status, _ = await conn.request("GET", f"/do/{nomor}")
+                ok = status == 200
+            elif op == "update":
+                status, _ = await conn.request("PUT", f"/do/{nomor}", {"Qty": rng.choice([8000, 16000]), "Keterangan": "load test"})
+                ok = status == 200
+            elif op == "pdf":
+                status, payload = await conn.request("GET", f"/do/{nomor}/pdf")
+                ok = status == 200 and payload.startswith(b"%PDF")
+            else:
+                status, payload = await conn.request("POST", "/do/reserve")
+                ok = status == 201
+                if ok:
+                    reserved = json.loads(payload)["NOMOR DO"]
+                    row = {k: v for k, v in template.items() if k not in ("No", "Month")}
+                    status, _ = await conn.request("POST", "/do", dict(row, **{"NOMOR DO": reserved}))
+                    ok = status == 201
+                    if ok:
+                        numbers.append(reserved)
+            elapsed = (time.perf_counter() - t0) * 1000
+            if ok:
+                samples[op].append(elapsed)
+            else:
+                errors[op] = errors.get(op, 0) + 1
+    finally:
+        await conn.close()
+
+
+async def seed_numbers(host, port, count=20):
+    """Buat beberapa DO baru sebagai sasaran get/update/pdf (server yang sudah jalan)."""
+    conn = Connection(host, port)
+    numbers = []
+    try:
+        for row in synthetic_rows(count):
+            body = {k: v for k, v in row.items() if k not in ("No", "Month", "NOMOR DO")}
+            status, payload = await conn.request("POST", "/do", body)
+            if status != 201:
+                raise RuntimeError(f"Gagal membuat DO awal ({status}): {payload[:200]!r}")
+            numbers.append(json.loads(payload)["NOMOR DO"])
+    finally:
+        await conn.close()
+    return numbers
+
+
+def percentile(values, q):
+    return round(values[min(len(values) - 1, int(len(values) * q))], 3) if values else None
+
+
+async def run_load(host, port, numbers, concurrency, duration, mix, seed):
+    samples = {op: [] for op in mix}
+    errors = {}
+    rng = random.Random(seed)
+    t0 = time.monotonic()
+    stop_at = t0 + duration
+    await asyncio.gather(*(
+        client(host, port, numbers, mix, stop_at, samples, errors, random.Random(rng.random()))
+        for _ in range(concurrency)
+    ))
+    elapsed = time.monotonic() - t0
+    total = sum(len(v) for v in samples.values())
+    report = {"duration_s": round(elapsed, 3), "requests": total, "requests_per_second": round(total / elapsed, 1),
+              "errors": errors, "operations": {}}
+    for op, values in samples.items():
+        values.sort()
+        report["operations"][op] = {
+            "count": len(values),
+            "per_second": round(len(values) / elapsed, 1),
+            "p50_ms": percentile(values, 0.50),
+            "p95_ms": percentile(values, 0.95),
+            "p99_ms": percentile(values, 0.99),
+            "max_ms": round(values[-1], 3) if values else None,
+        }
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test HTTP API Surat Jalan")
+    parser.add_argument("--url", help="Server yang sudah jalan (default: jalankan api.py sementara)")
+    parser.add_argument("--rows", type=int, default=10000, help="Jumlah riwayat DO sintetis (server sementara)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0, help="Lama pengujian (detik)")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Pemanasan sebelum diukur (detik)")
+    parser.add_argument("--mix", type=json.loads, default=DEFAULT_MIX, help='Bobot operasi, mis. \'{"get": 90, "pdf": 10}\'')
+    parser.add_argument("--pdf-workers", type=int, help="Proses render PDF server (default: semua core)")
+    parser.add_argument("--header", default=os.path.join(ROOT, "sha.jpg"), help="Gambar header PDF ('' = tanpa)")
+    parser.add_argument("--port", type=int, default=8611)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Tulis JSON ke file ini (default: stdout)")
+    args = parser.parse_args(argv)
+
+    workdir = server = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+        numbers = None
+    else:
+        from core.storage import SQLiteStorage
+
+        host, port = "127.0.0.1", args.port
+        workdir = tempfile.mkdtemp(prefix="load_api_")
+        if args.header and os.path.exists(args.header):
+            os.makedirs(os.path.join(workdir, "assets"))
+            shutil.copy(args.header, os.path.join(workdir, "assets", "sha.jpg"))
+        print(f"Menyiapkan {args.rows} DO sintetis...", file=sys.stderr)
+        numbers = SQLiteStorage(os.path.join(workdir, "load.sqlite3"), import_from=None).insert_many(synthetic_rows(args.rows))
+        command = [sys.executable, os.path.join(ROOT, "api.py"), "--port", str(port), "--db", "load.sqlite3"]
+        if args.pdf_workers:
+            command += ["--pdf-workers", str(args.pdf_workers)]
+        server = subprocess.Popen(command, cwd=workdir)
+
+    try:
+        asyncio.run(wait_ready(host, port))
+        if numbers is None:
+            numbers = asyncio.run(seed_numbers(host, port))
+        if args.warmup:
+            asyncio.run(run_load(host, port, numbers, args.concurrency, args.warmup, args.mix, args.seed))
+        print(f"Load test {args.duration:g} detik, {args.concurrency} klien...", file=sys.stderr)
+        result = asyncio.run(run_load(host, port, numbers, args.concurrency, args.duration, args.mix, args.seed))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "environment": environment(),
+        "config": {"rows": None if args.url else args.rows, "concurrency": args.concurrency,
+                   "duration_s": args.duration, "mix": args.mix, "pdf_workers": args.pdf_workers},
+        "result": result,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
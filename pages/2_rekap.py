@@ -1,69 +1,72 @@
 import streamlit as st
 import pandas as pd
-import os
+from datetime import datetime
 
-# --- Konfigurasi Awal (Harus sama dengan file input) ---
-DB_PATH = "dbase.xlsx"
+from core.batch import render_pdf_batch, render_pdf_merged
+from core.data import get_dataset, get_rollup
+from core.export import FORMATS, export_file
+from core.filters import intersect
+from core.storage import get_storage
+from core.theme import set_background
+
+# --- Konfigurasi Awal (path database ada di core/schema.py) ---
+PAGE_SIZES = [25, 50, 100, 250, "Semua"]  # Pilihan baris per halaman grid
+DEFAULT_PAGE_SIZE = 50
 
 st.set_page_config(page_title="Rekap Data Surat Jalan", layout="wide")
+set_background('bg.png')
 st.title("📊 Rekap Data Surat Jalan")
 st.markdown("Filter, cari, dan unduh data Delivery Order (DO) di sini.")
 
 # --- Fungsi Helper ---
-@st.cache_data
 def load_data():
-    """Memuat data dari Excel dengan caching."""
-    if os.path.exists(DB_PATH):
-        try:
-            df = pd.read_excel(DB_PATH)
-            # Pastikan kolom 'Date' dan 'Tgl PO' adalah tipe datetime
-            df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-            df['Tgl PO'] = pd.to_datetime(df['Tgl PO'], errors='coerce')
-            return df
-        except Exception as e:
-            st.error(f"Gagal membaca file Excel. Pastikan formatnya benar. Error: {e}")
-            return pd.DataFrame()
-    else:
-        return pd.DataFrame()
+    """Memuat index filter dari cache bersama (selalu versi data terbaru, tanpa parse ulang)."""
+    try:
+        # Kolom 'Date' dan 'Tgl PO' sudah dikonversi ke datetime oleh storage.
+        # Frame ini dipakai bersama semua sesi: jangan diubah di tempat.
+        return get_dataset(get_storage()).filters
+    except Exception as e:
+        st.error(f"Gagal membaca database. Error: {e}")
+        return None
 
-df = load_data()
+fidx = load_data()
+df = fidx.frame if fidx is not None else pd.DataFrame()
 
 if df.empty:
-    st.warning("Belum ada data surat jalan tersimpan di dbase.xlsx.")
+    st.warning("Belum ada data surat jalan tersimpan di database.")
 else:
     # --- 1. Sidebar untuk Filter ---
+    # Setiap filter menghasilkan posisi baris dari index (dibangun sekali per versi
+    # data); posisi digabung dengan irisan lalu frame diambil sekali di akhir.
     st.sidebar.header("Opsi Filter Data")
+    rollup = get_rollup(get_storage())
+    # Metrik dibaca dari rollup (tanpa DO tak bertanggal) hanya jika filter rentang tanggal
+    # benar-benar diterapkan (grid juga tanpa DO tak bertanggal) dan tidak memotong data terpilih
+    use_rollup = False
     
     # Filter Bulan
-    if 'Month' in df.columns:
-        months = df['Month'].unique()
-        selected_month = st.sidebar.multiselect("Pilih Bulan", sorted(months), default=months)
-        df_filtered = df[df['Month'].isin(selected_month)]
-    else:
-        df_filtered = df
+    months = fidx.months
+    selected_month = st.sidebar.multiselect("Pilih Bulan", months, default=months)
+    positions = fidx.by_months(selected_month)
+    rollup = rollup[rollup['Month'].isin(selected_month)]
 
     # Filter Klien
-    if 'Client' in df_filtered.columns:
-        clients = df_filtered['Client'].dropna().unique()
-        selected_client = st.sidebar.selectbox("Filter Berdasarkan Client", 
-                                               ['Semua'] + sorted(clients))
-        if selected_client != 'Semua':
-            df_filtered = df_filtered[df_filtered['Client'] == selected_client]
+    clients = fidx.clients(positions)
+    selected_client = st.sidebar.selectbox("Filter Berdasarkan Client", 
+                                           ['Semua'] + clients)
+    if selected_client != 'Semua':
+        positions = intersect(positions, fidx.by_client(selected_client))
+        rollup = rollup[rollup['Client'] == selected_client]
 
     # Filter Range Tanggal
-    # Filter Range Tanggal
-    if not df.empty and 'Date' in df.columns and df['Date'].notna().any():
-        # Pastikan kolom Date di seluruh data (df) adalah datetime
-        df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-        
-        # Ambil min/max date dari SELURUH data (df) untuk batas input
-        full_min_date = df['Date'].min().date()
-        full_max_date = df['Date'].max().date()
+    full_range = fidx.date_bounds()
+    if full_range is not None:
+        # Ambil min/max date dari SELURUH data untuk batas input
+        full_min_date, full_max_date = full_range
         
         # Terapkan tanggal awal dan akhir dari data yang sudah difilter untuk default value
-        # Jika df_filtered kosong, gunakan batas dari full data
-        default_start_date = df_filtered['Date'].min().date() if not df_filtered.empty else full_min_date
-        default_end_date = df_filtered['Date'].max().date() if not df_filtered.empty else full_max_date
+        # Jika hasil filter kosong, gunakan batas dari full data
+        default_start_date, default_end_date = fidx.date_bounds(positions) or full_range
         
         # Jika tanggal min/max filtered tidak valid (misal, karena filter bulan kosong), gunakan full data
         try:
@@ -82,25 +85,48 @@ else:
         if len(date_range) == 2:
             start_date = pd.to_datetime(date_range[0]).normalize()
             end_date = pd.to_datetime(date_range[1]).normalize()
-            
-            # Terapkan filter tanggal ke data yang sudah difilter (df_filtered)
-            df_filtered = df_filtered[
-                (df_filtered['Date'].dt.normalize() >= start_date) & 
-                (df_filtered['Date'].dt.normalize() <= end_date)
+            use_rollup = start_date.date() <= default_start_date and end_date.date() >= default_end_date
+            # Ringkasan bulanan: ambil periode yang beririsan dengan rentang tanggal
+            rollup = rollup[
+                (rollup['Periode'] >= start_date.strftime('%Y-%m')) &
+                (rollup['Periode'] <= end_date.strftime('%Y-%m'))
             ]
+            
+            # Rentang tanggal dijawab binary search pada index tanggal
+            positions = intersect(positions, fidx.by_date(start_date, end_date))
+
+    # Kolom 'Keterangan' sudah berupa string di frame index (tanpa astype per rerun)
+    df_filtered = fidx.take(positions)
 
     st.subheader(f"Data Tampil ({len(df_filtered)} dari {len(df)} total baris)")
 
-    # --- KOREKSI KRUSIAL: Konversi Tipe Data sebelum data_editor ---
-    # Konversi kolom 'Keterangan' (yang mungkin dibaca float karena NaN) ke string
-    if 'Keterangan' in df_filtered.columns:
-        df_filtered['Keterangan'] = df_filtered['Keterangan'].astype(str)
-        
-    # --- 2. Tampilkan DataFrame Interaktif ---
-    # Menggunakan st.data_editor agar bisa disorting dan dicari
+    # --- 2. Tampilkan DataFrame Interaktif (per halaman) ---
+    # Urut & potong halaman dilakukan di server; hanya baris halaman aktif yang
+    # dikirim ke browser. Total di bawah tetap menghitung seluruh data terfilter.
+    col_sort, col_order, col_size, col_page = st.columns([3, 2, 2, 2])
+    with col_sort:
+        sort_column = st.selectbox("Urutkan Berdasarkan", list(df.columns), index=list(df.columns).index("No"), key='rekap_sort')
+    with col_order:
+        sort_ascending = st.radio("Urutan", ["Naik", "Turun"], horizontal=True, key='rekap_order') == "Naik"
+    with col_size:
+        page_size = st.selectbox("Baris per Halaman", PAGE_SIZES, index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE), key='rekap_page_size')
+
+    total_rows = len(df_filtered)
+    page_size = (total_rows or 1) if page_size == "Semua" else page_size
+    total_pages = max(1, -(-total_rows // page_size))
+    # Filter berubah dan jumlah halaman mengecil: pindah ke halaman terakhir yang ada
+    if st.session_state.get('rekap_page', 1) > total_pages:
+        st.session_state['rekap_page'] = total_pages
+    with col_page:
+        page = st.number_input(f"Halaman (dari {total_pages})", min_value=1, max_value=total_pages, step=1, key='rekap_page')
+
+    page_positions = fidx.sort(positions, sort_column, ascending=sort_ascending)
+    page_positions = page_positions[(page - 1) * page_size:page * page_size]
+    st.caption(f"Menampilkan baris {min((page - 1) * page_size + 1, total_rows)}–{min(page * page_size, total_rows)} dari {total_rows}")
+
     st.data_editor(
-        df_filtered.reset_index(drop=True),
-        use_container_width=True,
+        fidx.take(page_positions).reset_index(drop=True),
+        width='stretch',
         # Mengatur beberapa kolom agar tampilan lebih rapi
         column_config={
             "Date": st.column_config.DatetimeColumn("Date", format="YYYY/MM/DD"),
@@ -115,10 +141,17 @@ else:
     
     col_total_qty, col_total_do = st.columns(2) # Membuat dua kolom untuk metrik
 
+    # Dari rollup jika rentang tanggal penuh menutup data terpilih (DO tanpa tanggal tidak
+    # ikut di grid maupun rollup); selain itu dijumlah dari baris yang tampil di grid.
+    if use_rollup:
+        total_qty = rollup.loc[rollup['Periode'] != '', 'Qty'].sum()
+        total_do = int(rollup.loc[rollup['Periode'] != '', 'Jumlah DO'].sum())
+    else:
+        total_qty = df_filtered['Qty'].sum()
+        total_do = len(df_filtered)
+
     # Menghitung Total Quantity
     if 'Qty' in df_filtered.columns:
-        # Menghitung total Quantity (volume) dari data yang difilter
-        total_qty = df_filtered['Qty'].sum()
         with col_total_qty:
             st.metric(
                 label="TOTAL QTY TAMPIL (Liter)", 
@@ -129,16 +162,97 @@ else:
     with col_total_do:
         st.metric(
             label="TOTAL SURAT JALAN TAMPIL", 
-            value=f"{len(df_filtered)}"
+            value=f"{total_do}"
         )
+
+    # --- Ringkasan Bulanan (dari tabel rollup) ---
+    st.subheader("🗓️ Ringkasan per Bulan, Client & Jenis BBM")
+    summary = (
+        rollup[rollup['Periode'] != '']
+        .groupby(['Periode', 'Client', 'Jenis BBM'], as_index=False)[['Qty', 'Jumlah DO']]
+        .sum()
+        .sort_values(['Periode', 'Client', 'Jenis BBM'], ascending=[False, True, True])
+    )
+    st.dataframe(
+        summary,
+        width='stretch',
+        hide_index=True,
+        column_config={"Qty": st.column_config.NumberColumn("Qty", format="%.0f Liter")},
+    )
+    st.caption("Ringkasan dihitung per bulan penuh untuk bulan yang beririsan dengan rentang tanggal.")
     
     st.divider()
 
     # --- 4. Tombol Download ---
-    csv = df_filtered.to_csv(index=False).encode('utf-8')
+    # File baru dibuat saat tombol diklik (ditulis per potongan baris ke file sementara)
+    export_format = st.selectbox("Format File", list(FORMATS), key='rekap_export_format')
+    export_ext, export_mime, _ = FORMATS[export_format]
+
+    def build_export(fmt=export_format, frame=fidx.frame, rows=positions):
+        with export_file(fmt, frame, rows) as f:
+            return f.read()
+
     st.download_button(
-        label="⬇️ Download Data Tampil ke CSV",
-        data=csv,
-        file_name='rekap_surat_jalan_filtered.csv',
-        mime='text/csv',
+        label=f"⬇️ Download Data Tampil ke {export_format}",
+        data=build_export,
+        file_name=f'rekap_surat_jalan_filtered.{export_ext}',
+        mime=export_mime,
+    )
+
+    st.divider()
+
+    # --- 5. Cetak Massal Surat Jalan (ZIP) ---
+    st.subheader("🖨️ Cetak Massal Surat Jalan")
+    st.markdown(
+        f"Render ulang PDF untuk **{len(df_filtered)}** DO yang sedang tampil (sesuai filter): "
+        "sebagai satu file ZIP (satu PDF per DO), atau satu PDF gabungan yang bisa dicetak sekali jalan."
     )
+    col_zip, col_gabung = st.columns(2)
+    with col_zip:
+        buat_zip = st.button("📦 Buat ZIP PDF Surat Jalan", disabled=df_filtered.empty, width='stretch')
+    with col_gabung:
+        buat_gabungan = st.button("📄 Buat PDF Gabungan", disabled=df_filtered.empty, width='stretch')
+
+    if buat_gabungan:
+        with st.spinner(f"Menyusun {len(df_filtered)} DO ke satu PDF..."):
+            # Urut tanggal lalu nomor DO, seperti urutan keberangkatan
+            urut = df_filtered.sort_values(["Date", "NOMOR DO"], kind="stable")
+            st.session_state['merged_pdf'] = render_pdf_merged(urut.to_dict("records"))
+
+    if st.session_state.get('merged_pdf'):
+        pdf_bytes, errors = st.session_state['merged_pdf']
+        if errors:
+            with st.expander(f"{len(errors)} DO dilewati di PDF gabungan"):
+                for nomor, pesan in errors:
+                    st.write(f"**{nomor}**: {pesan}")
+        if pdf_bytes:
+            st.download_button(
+                label=f"⬇️ Download PDF Gabungan ({len(pdf_bytes) / 1024:,.0f} KB)",
+                data=pdf_bytes,
+                file_name=f"surat_jalan_gabungan_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+                mime='application/pdf',
+            )
+
+    if buat_zip:
+        progress_bar = st.progress(0.0, text="Menyiapkan cetak massal...")
+
+        def update_progress(done, total):
+            progress_bar.progress(done / total, text=f"{done} / {total} DO selesai dirender")
+
+        zip_bytes, errors = render_pdf_batch(df_filtered.to_dict("records"), progress=update_progress)
+        st.session_state['batch_zip'] = zip_bytes
+        st.session_state['batch_errors'] = errors
+
+    if st.session_state.get('batch_zip'):
+        errors = st.session_state.get('batch_errors', [])
+        if errors:
+            st.warning(f"{len(errors)} DO gagal dirender (detail ada di ERROR.txt dalam ZIP).")
+            with st.expander("Lihat DO yang gagal"):
+                for nomor, pesan in errors:
+                    st.write(f"**{nomor}**: {pesan}")
+        st.download_button(
+            label="⬇️ Download ZIP Surat Jalan",
+            data=st.session_state['batch_zip'],
+            file_name=f"surat_jalan_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
+            mime='application/zip',
+        )
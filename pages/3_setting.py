@@ -1,42 +1,25 @@
 import streamlit as st
 import pandas as pd
 import os
-import shutil
+import io
 from datetime import datetime
-import json
-
-# --- 1. Konfigurasi Path ---
-DB_PATH = "dbase.xlsx"
-CONFIG_PATH = "config_identitas.json" # File untuk menyimpan data identitas perusahaan
-ASSETS_FOLDER = "assets"
-os.makedirs(ASSETS_FOLDER, exist_ok=True) # Pastikan folder assets ada
-
-# --- 2. Fungsi Helper ---
-
-def load_config():
-    """Memuat data konfigurasi dari file JSON."""
-    if os.path.exists(CONFIG_PATH):
-        with open(CONFIG_PATH, 'r') as f:
-            return json.load(f)
-    # Default jika file belum ada
-    return {
-        "Nama Perusahaan": "PT. SHA SOLO",
-        "Alamat 1": "Jl. Yosodipuro No. 21 Surakarta 57131",
-        "Telepon": "0271-644987 (Hunting) / 081-325-999-999",
-        "Email": "sha@shasolo.com / marketing@shasolo.com",
-        "Website": "www.shasolo.com"
-    }
-
-def save_config(config_data):
-    """Menyimpan data konfigurasi ke file JSON."""
-    with open(CONFIG_PATH, 'w') as f:
-        json.dump(config_data, f, indent=4)
+
+from core.backup import KEEP_DAILY, KEEP_HOURLY, KEEP_LAST, KEEP_MONTHLY, get_backup_manager
+from core.config import load_config, save_config
+from core.pdf import HEADER_UPLOAD_PATH, find_header_path, save_header_upload
+from core.storage import get_storage
+from core.theme import set_background
+
+# --- Konfigurasi ---
+# Path database, folder assets dan identitas perusahaan ada di core/ (di-cache,
+# dipakai juga oleh PDF); folder assets dibuat saat header pertama di-upload.
 
 # --- Halaman Streamlit ---
 st.set_page_config(page_title="Pengaturan Sistem", layout="centered")
+set_background('bg.png')
 st.title("⚙️ Pengaturan Sistem")
 
-# Muat data identitas saat aplikasi dimulai
+# Muat data identitas (dari cache; file hanya dibaca ulang jika berubah)
 config = load_config()
 
 # =================================================================
@@ -73,28 +56,28 @@ st.divider()
 ## B. Pengaturan Aset Gambar (Header PDF)
 # =================================================================
 st.header("2. Pengaturan Header & Logo")
-st.info(f"Gambar header Anda saat ini tersimpan di: **{ASSETS_FOLDER}/header_sha.png**")
+header_aktif = find_header_path()
+st.info(f"Gambar header Anda saat ini tersimpan di: **{header_aktif[0] if header_aktif else HEADER_UPLOAD_PATH}**")
 
 uploaded_file = st.file_uploader(
-    "Upload Gambar Header Baru (PNG atau JPG, disarankan resolusi tinggi, lebar sekitar 18cm)", 
+    "Upload Gambar Header Baru (PNG atau JPG). Gambar otomatis disesuaikan ke ukuran cetak KOP 20.8 x 3.5 cm (300 dpi).", 
     type=["png", "jpg", "jpeg"]
 )
 
-if uploaded_file is not None:
-    # Tentukan nama file target di folder assets
-    file_extension = uploaded_file.name.split('.')[-1]
-    target_path = os.path.join(ASSETS_FOLDER, "header_sha.png")
-    
-    # Simpan file yang diunggah
-    with open(target_path, "wb") as f:
-        f.write(uploaded_file.getbuffer())
-        
-    st.success(f"✅ Gambar header baru berhasil disimpan di: {target_path}. Mohon refresh halaman lain (Input & Cetak DO) untuk melihat perubahan.")
+# Olah sekali per file upload (bukan di setiap rerun selama file masih terpilih)
+if uploaded_file is not None and st.session_state.get('header_upload_id') != uploaded_file.file_id:
+    try:
+        target_path = save_header_upload(uploaded_file)
+        st.session_state['header_upload_id'] = uploaded_file.file_id
+        st.success(f"✅ Gambar header baru berhasil disimpan di: {target_path} ({os.path.getsize(target_path) / 1024:,.0f} KB). PDF berikutnya langsung memakai header ini.")
+        header_aktif = find_header_path()
+    except Exception as e:
+        st.error(f"Gagal memproses gambar header: {e}")
 
 # Tampilkan preview header yang sudah ada
-if os.path.exists(os.path.join(ASSETS_FOLDER, "header_sha.png")):
+if header_aktif:
     st.subheader("Preview Header Saat Ini")
-    st.image(os.path.join(ASSETS_FOLDER, "header_sha.png"), width=400)
+    st.image(header_aktif[0], width=400)
 else:
     st.warning("Header/Logo belum ditemukan di folder assets.")
 
@@ -105,20 +88,76 @@ st.divider()
 # =================================================================
 st.header("3. Opsi Sistem")
 
-if st.button("📦 Backup Database"):
-    if os.path.exists(DB_PATH):
-        # Buat folder backup jika belum ada
-        BACKUP_DIR = "backup_data"
-        os.makedirs(BACKUP_DIR, exist_ok=True)
-        
-        # Tentukan nama file backup
-        today = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_path = os.path.join(BACKUP_DIR, f"dbase_backup_{today}.xlsx")
-        
-        # Lakukan proses copy
-        shutil.copy(DB_PATH, backup_path)
-        st.success(f"✅ Backup database berhasil dibuat di: **{backup_path}**")
+# --- Backup & Restore ---
+# Backup berjalan otomatis tiap jam di latar belakang (hanya jika ada perubahan),
+# hanya menyimpan potongan data yang berubah, terkompresi, dengan retensi bertingkat.
+st.subheader("Backup & Restore")
+backup = get_backup_manager(get_storage())
+st.caption(
+    f"Retensi: {KEEP_LAST} backup terakhir, 1 backup per jam ({KEEP_HOURLY} jam terakhir), per hari ({KEEP_DAILY} hari), "
+    f"dan per bulan ({KEEP_MONTHLY} bulan). Total ukuran folder backup: {backup.folder_size() / 1024:,.0f} KB."
+)
+if backup.last_error:
+    st.error(f"Backup terakhir gagal: {backup.last_error}")
+
+if st.button("📦 Backup Database Sekarang"):
+    # Dikerjakan worker backup; halaman tidak menunggu
+    backup.request_backup()
+    st.toast("📦 Backup sedang dibuat di latar belakang.", icon="⏳")
+
+snapshot_ids = backup.snapshot_ids()
+if snapshot_ids:
+    summaries = [backup.manifest(s) for s in reversed(snapshot_ids)]
+    st.dataframe(
+        pd.DataFrame({
+            "Waktu Backup": [m["created_at"].replace("T", " ") for m in summaries],
+            "Jumlah DO": [m["row_count"] for m in summaries],
+            "Data Baru (KB)": [round(m["bytes_written"] / 1024, 1) for m in summaries],
+        }),
+        width='stretch', hide_index=True, height=200,
+    )
+
+    st.markdown("**Restore ke titik waktu**")
+    col_date, col_time = st.columns(2)
+    restore_date = col_date.date_input("Tanggal", value=datetime.now().date(), key='restore_date')
+    restore_time = col_time.time_input("Jam", value=datetime.now().time(), key='restore_time')
+    target_id = backup.find(datetime.combine(restore_date, restore_time))
+    if target_id is None:
+        st.info("Tidak ada backup pada atau sebelum waktu tersebut.")
     else:
-        st.error(f"File database tidak ditemukan di: {DB_PATH}. Tidak dapat melakukan backup.")
-
-st.info("Anda bisa mengembangkan fitur lain seperti Restore Data atau Pengaturan User di sini.")
+        target = backup.manifest(target_id)
+        st.write(f"Backup yang dipakai: **{target['created_at'].replace('T', ' ')}** ({target['row_count']} DO)")
+        confirm = st.checkbox("Saya paham seluruh data DO saat ini akan diganti dengan isi backup ini.")
+        if st.button("♻️ Restore Data", disabled=not confirm):
+            try:
+                jumlah = backup.restore(target_id)
+                st.success(f"✅ Data berhasil dikembalikan ({jumlah} DO). Data sebelum restore sudah di-backup.")
+            except Exception as e:
+                st.error(f"Gagal restore data: {e}")
+else:
+    st.info("Belum ada backup. Backup pertama dibuat otomatis di latar belakang.")
+
+# --- Import / Export Excel (kompatibel dengan dbase.xlsx lama) ---
+st.subheader("Import / Export Excel")
+
+if st.button("📤 Siapkan Export Excel"):
+    buffer = io.BytesIO()
+    get_storage().export_xlsx(buffer)
+    st.download_button(
+        label="⬇️ Download dbase.xlsx",
+        data=buffer.getvalue(),
+        file_name="dbase.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
+
+import_file = st.file_uploader("Import data dari Excel (format dbase.xlsx)", type=["xlsx"])
+if import_file is not None:
+    replace_all = st.checkbox("Ganti seluruh data yang ada (bukan digabung)", value=False)
+    if st.button("📥 Import Data Excel"):
+        try:
+            jumlah = get_storage().import_xlsx(import_file, replace=replace_all)
+            st.success(f"✅ {jumlah} baris DO berhasil diimport ke database.")
+        except Exception as e:
+            st.error(f"Gagal import data: {e}")
+
+st.info("Anda bisa mengembangkan fitur lain seperti Pengaturan User di sini.")
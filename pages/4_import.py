@@ -0,0 +1,96 @@
+import streamlit as st
+import hashlib
+import io
+
+from core.importer import ERROR_COLUMNS, MAPPABLE_COLUMNS, REQUIRED_COLUMNS, read_table, suggest_mapping, validate
+from core.jobs import get_job_queue
+from core.pdf import PDF_FOLDER
+from core.storage import get_storage
+from core.theme import set_background
+
+# --- Konfigurasi Awal ---
+KOSONG = "(tidak ada)"
+
+st.set_page_config(page_title="Import Massal DO", layout="wide")
+set_background('bg.png')
+st.title("📥 Import Massal DO")
+st.markdown("Upload file order harian dari client (Excel/CSV/JSON), cocokkan kolomnya, lalu simpan semua DO sekaligus.")
+
+# --- Fungsi Helper ---
+@st.cache_data(show_spinner=False, max_entries=4)
+def load_upload(data, name):
+    """Baca file upload sekali per isi file (tidak diulang di setiap rerun)."""
+    return read_table(io.BytesIO(data), name)
+
+def to_job_rows(rows):
+    """Format baris valid seperti data form (tanggal 'YYYY-MM-DD', kosong = '') untuk render PDF."""
+    rows = rows.assign(**{col: rows[col].dt.strftime("%Y-%m-%d") for col in ["Date", "Tgl PO"]})
+    return rows.astype(object).where(rows.notna(), "").to_dict("records")
+
+# --- 1. Upload File ---
+uploaded = st.file_uploader("Upload file order (XLSX, CSV atau JSON)", type=["xlsx", "csv", "json"])
+
+if st.session_state.get('import_result'):
+    st.success(st.session_state.pop('import_result'))
+
+if uploaded is None:
+    st.info(f"Kolom wajib: **{', '.join(REQUIRED_COLUMNS)}**. NOMOR DO yang kosong akan dibuatkan nomor baru; NOMOR DO yang sudah ada di database tidak diimport (ubah lewat halaman Input).")
+else:
+    try:
+        raw = load_upload(uploaded.getvalue(), uploaded.name)
+    except Exception as e:
+        st.error(f"Gagal membaca file: {e}")
+        st.stop()
+
+    st.subheader(f"Isi File ({len(raw)} baris)")
+    st.dataframe(raw.head(10).astype(str), width='stretch')  # Sel Excel/JSON bisa campuran angka & teks
+
+    # --- 2. Pemetaan Kolom ---
+    st.subheader("Pemetaan Kolom")
+    st.caption("Pilih kolom file untuk setiap kolom database. Kolom 'Month' dihitung otomatis dari 'Date'.")
+    suggested = suggest_mapping(raw.columns)
+    choices = [KOSONG] + list(raw.columns)
+    mapping = {}
+    grid = st.columns(3)
+    for i, col in enumerate(MAPPABLE_COLUMNS):
+        default = suggested.get(col)
+        label = f"{col} *" if col in REQUIRED_COLUMNS else col
+        with grid[i % 3]:
+            picked = st.selectbox(label, choices, index=choices.index(default) if default else 0,
+                                  key=f"map_{uploaded.name}_{col}")
+        mapping[col] = None if picked == KOSONG else picked
+
+    # --- 3. Validasi ---
+    rows, errors = validate(raw, mapping, get_storage())
+    col_ok, col_bad = st.columns(2)
+    col_ok.metric("BARIS VALID", len(rows))
+    col_bad.metric("BARIS BERMASALAH", raw.index.size - len(rows))
+
+    if not errors.empty:
+        st.warning("Baris berikut tidak akan diimport. Perbaiki file lalu upload ulang jika perlu.")
+        st.dataframe(errors[ERROR_COLUMNS], width='stretch', hide_index=True)
+
+    if not rows.empty:
+        with st.expander(f"Lihat {len(rows)} baris yang akan diimport"):
+            st.dataframe(rows, width='stretch', hide_index=True)
+
+        file_id = hashlib.sha1(uploaded.getvalue()).hexdigest()
+        already_imported = file_id in st.session_state.setdefault('imported_files', set())
+        if already_imported:
+            st.info("File ini sudah diimport di sesi ini. Upload file lain untuk import berikutnya.")
+
+        queue_pdf = st.checkbox("Buat PDF Surat Jalan untuk semua DO yang diimport (di latar belakang)", value=False)
+        if st.button(f"💾 Import {len(rows)} DO", type="primary", disabled=already_imported):
+            try:
+                # Satu transaksi: nomor DO baru dibagikan sebagai satu blok, semua baris ditulis sekaligus
+                numbers = get_storage().insert_many(rows.to_dict("records"))
+                message = f"✅ {len(numbers)} DO berhasil diimport ({numbers[0]} s/d {numbers[-1]})."
+                if queue_pdf:
+                    job_rows = to_job_rows(rows.assign(**{"NOMOR DO": numbers}))
+                    get_job_queue(get_storage(), PDF_FOLDER).submit_many(job_rows, kind="render")
+                    message += f" {len(job_rows)} PDF masuk antrian cetak (tersimpan di folder {PDF_FOLDER})."
+                st.session_state['imported_files'].add(file_id)
+                st.session_state['import_result'] = message
+                st.rerun()
+            except Exception as e:
+                st.error(f"Gagal import data: {e}")
@@ -0,0 +1,62 @@
+import streamlit as st
+import pandas as pd
+
+from core import metrics
+from core.theme import set_background
+
+st.set_page_config(page_title="Metrik Kinerja", layout="wide")
+set_background('bg.png')
+st.title("📈 Metrik Kinerja")
+st.markdown(
+    "Durasi operasi penting (baca/tulis database, alokasi nomor DO, pembuatan PDF, filter rekap) "
+    "sejak server terakhir dijalankan. Log lengkap setiap operasi ada di "
+    f"`{metrics.LOG_PATH.format(pid='<pid>')}` (satu file per proses, berotasi otomatis)."
+)
+
+rows = metrics.snapshot()
+
+if not rows:
+    st.info("Belum ada operasi yang tercatat. Buka halaman Input atau Rekap terlebih dahulu.")
+else:
+    # --- 1. Ringkasan per Operasi ---
+    summary = pd.DataFrame(rows)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Jumlah Operasi", f"{int(summary['Jumlah'].sum()):,}")
+    col2.metric("Total Waktu", f"{summary['Total (ms)'].sum() / 1000:,.2f} detik")
+    col3.metric("Operasi Gagal", f"{int(summary['Error'].sum()):,}")
+
+    st.dataframe(
+        summary.sort_values("Total (ms)", ascending=False),
+        hide_index=True,
+        width='stretch',
+        column_config={
+            col: st.column_config.NumberColumn(col, format="%.2f")
+            for col in ["Rata-rata (ms)", "p50 (ms)", "p95 (ms)", "Maks (ms)", "Total (ms)"]
+        },
+    )
+    st.caption("p50/p95 diperkirakan dari bucket histogram.")
+
+    # --- 2. Histogram Latensi ---
+    st.subheader("📊 Histogram Latensi")
+    operation = st.selectbox("Operasi", summary["Operasi"].tolist())
+    histogram = pd.DataFrame(metrics.buckets(operation), columns=["Durasi", "Jumlah"])
+    st.bar_chart(histogram.set_index("Durasi"), sort=False)
+
+# --- 3. Ekspor & Reset ---
+st.markdown("---")
+col_export, col_reset = st.columns(2)
+with col_export:
+    st.download_button(
+        "⬇️ Unduh Format Prometheus",
+        data=metrics.to_prometheus,
+        file_name="metrics.prom",
+        mime="text/plain",
+        width='stretch',
+    )
+with col_reset:
+    if st.button("🔄 Reset Metrik", width='stretch'):
+        metrics.reset()
+        st.rerun()
+
+with st.expander("Lihat teks Prometheus"):
+    st.code(metrics.to_prometheus(), language="text")